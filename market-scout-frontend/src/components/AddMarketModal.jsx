@@ -11,6 +11,8 @@ import { useMarketCreate } from '../hooks/useApi';
 export default function AddMarketModal({ onClose, onSuccess }) {
   const [form, setForm] = useState({ name: '', address: '', type: '' });
   const [focusedField, setFocusedField] = useState(null);
+  // Existing markets the API thinks this one duplicates (409), shown until the form changes
+  const [candidates, setCandidates] = useState(null);
   const { createMarket, submitting, result } = useMarketCreate();
 
   const marketTypes = [
@@ -25,11 +27,13 @@ export default function AddMarketModal({ onClose, onSuccess }) {
     { value: 'other', label: 'Other' },
   ];
 
-  const handleSubmit = async (e) => {
-    e.preventDefault();
-    if (!form.name || !form.address || !form.type) return;
-
-    const response = await createMarket(form.name, form.address, form.type);
+  const submit = async (force = false) => {
+    const response = await createMarket(form.name, form.address, form.type, { force });
+    if (response.candidates) {
+      setCandidates(response.candidates);
+      return;
+    }
+    setCandidates(null);
     if (response.success) {
       setForm({ name: '', address: '', type: '' });
       onSuccess?.();
@@ -37,8 +41,15 @@ export default function AddMarketModal({ onClose, onSuccess }) {
     }
   };
 
+  const handleSubmit = async (e) => {
+    e.preventDefault();
+    if (!form.name || !form.address || !form.type) return;
+    await submit();
+  };
+
   const updateForm = (field, value) => {
     setForm(prev => ({ ...prev, [field]: value }));
+    setCandidates(null);
   };
 
   const isValid = form.name.length >= 2 && form.address.length >= 5 && form.type;
@@ -184,6 +195,44 @@ export default function AddMarketModal({ onClose, onSuccess }) {
             </div>
           )}
 
+          {candidates && (
+            <div style={{
+              padding: 'var(--space-4)',
+              borderRadius: 'var(--radius-xl)',
+              marginBottom: 'var(--space-5)',
+              backgroundColor: 'var(--color-cream-100)',
+              border: '1px solid var(--color-border-primary)',
+              fontSize: 'var(--text-sm)',
+              color: 'var(--color-text-secondary)',
+            }}>
+              <p style={{ fontWeight: 'var(--font-semibold)', marginBottom: 'var(--space-2)' }}>
+                This looks like a market that's already listed:
+              </p>
+              <ul style={{ margin: '0 0 var(--space-3)', paddingLeft: 'var(--space-5)' }}>
+                {candidates.map(c => (
+                  <li key={c.id}>{c.name} - {c.address}</li>
+                ))}
+              </ul>
+              <button
+                type="button"
+                onClick={() => submit(true)}
+                disabled={submitting}
+                style={{
+                  padding: 'var(--space-2) var(--space-4)',
+                  borderRadius: 'var(--radius-full)',
+                  border: '1px solid var(--color-sage-400)',
+                  backgroundColor: 'transparent',
+                  color: 'var(--color-sage-700)',
+                  fontSize: 'var(--text-sm)',
+                  fontWeight: 'var(--font-semibold)',
+                  cursor: submitting ? 'not-allowed' : 'pointer',
+                }}
+              >
+                It's a different market - add it anyway
+              </button>
+            </div>
+          )}
+
           <form onSubmit={handleSubmit}>
             <div style={{ display: 'flex', flexDirection: 'column', gap: 'var(--space-5)' }}>
               <div>
@@ -106,8 +106,8 @@ export function useMarkets() {
   const fetchMarkets = useCallback(async () => {
     setLoading(true);
     try {
-      const data = await api.getMarkets();
-      setMarkets(data);
+      const data = await api.getMarkets({ limit: 200 });
+      setMarkets(data.markets || []);
       setApiConnected(true);
     } catch (e) {
       // Fall back to mock data
@@ -139,7 +139,7 @@ export function useLeaderboard() {
   const fetchLeaderboard = useCallback(async () => {
     setLoading(true);
     try {
-      const data = await api.getLeaderboard();
+      const data = await api.getLeaderboard({ limit: 200 });
       setLeaderboard(data.leaderboard || []);
     } catch (e) {
       // Fall back to mock data
@@ -200,11 +200,12 @@ export function useMarketCreate() {
   const [submitting, setSubmitting] = useState(false);
   const [result, setResult] = useState(null);
 
-  const createMarket = useCallback(async (name, address, type) => {
+  // Pass { force: true } to create a market the API flagged as a likely duplicate
+  const createMarket = useCallback(async (name, address, type, { force } = {}) => {
     setSubmitting(true);
     setResult(null);
     try {
-      const data = await api.createMarket(name, address, type);
+      const data = await api.createMarket(name, address, type, { force });
       setResult({ success: true, message: 'Market created successfully!', market: data.market });
       return { success: true, market: data.market };
     } catch (e) {
@@ -212,6 +213,10 @@ export function useMarketCreate() {
         setResult({ success: true, message: 'Market created! (Demo mode)', mock: true });
         return { success: true, mock: true };
       }
+      if (e.status === 409 && e.data?.candidates?.length) {
+        // Likely duplicate: hand the matches back so the user can pick one or add anyway
+        return { success: false, error: e.message, candidates: e.data.candidates };
+      }
       setResult({ success: false, message: e.message });
       return { success: false, error: e.message };
     } finally {
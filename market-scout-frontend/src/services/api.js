@@ -175,20 +175,66 @@ class ApiService {
   // Market Endpoints - maps to app/routes/markets.py
   // ─────────────────────────────────────────────────────────────────
   
-  async getMarkets() {
-    return this._request('GET', '/');
+  // Returns { markets, next_cursor }; pass next_cursor back as `cursor` for the next page
+  async getMarkets({ limit, cursor, type } = {}) {
+    const params = new URLSearchParams();
+    if (limit) params.set('limit', limit);
+    if (cursor) params.set('cursor', cursor);
+    if (type) params.set('type', type);
+    const qs = params.toString();
+    return this._request('GET', qs ? `/?${qs}` : '/');
   }
 
-  async getLeaderboard() {
-    return this._request('GET', '/leaderboard');
+  // Returns { leaderboard: [{ id, name, type, address, score, rank }], total, next_offset }
+  async getLeaderboard({ offset, limit, type } = {}) {
+    const params = new URLSearchParams();
+    if (offset) params.set('offset', offset);
+    if (limit) params.set('limit', limit);
+    if (type) params.set('type', type);
+    const qs = params.toString();
+    return this._request('GET', qs ? `/leaderboard?${qs}` : '/leaderboard');
+  }
+
+  async getLeaderboardRank(marketId, type) {
+    const qs = type ? `?type=${encodeURIComponent(type)}` : '';
+    return this._request('GET', `/leaderboard/rank/${marketId}${qs}`);
+  }
+
+  // Returns { suggestions: [{ id, name, score }] }, most popular first
+  async suggestMarkets(prefix, limit) {
+    const params = new URLSearchParams({ prefix });
+    if (limit) params.set('limit', limit);
+    return this._request('GET', `/markets/suggest?${params.toString()}`);
+  }
+
+  // Returns { results: [{ ...market or review, rank }], next_cursor }
+  async search(q, { scope, limit, cursor } = {}) {
+    const params = new URLSearchParams({ q });
+    if (scope) params.set('scope', scope);
+    if (limit) params.set('limit', limit);
+    if (cursor) params.set('cursor', cursor);
+    return this._request('GET', `/search?${params.toString()}`);
   }
 
   async getMarketSentiment(marketId) {
     return this._request('GET', `/${marketId}/sentiment`);
   }
 
-  async createMarket(name, address, type) {
-    return this._request('POST', '/', { name, address, type }, true);
+  // A likely duplicate fails with status 409 and error.data.candidates; pass force: true to create anyway
+  async createMarket(name, address, type, { latitude, longitude, force } = {}) {
+    const body = { name, address, type };
+    if (latitude != null && longitude != null) Object.assign(body, { latitude, longitude });
+    if (force) body.force = true;
+    return this._request('POST', '/', body, true);
+  }
+
+  // Returns { markets: [{ id, name, type, address, distance_km }] }, nearest first
+  async getNearbyMarkets({ lat, lng, radiusKm, type, limit }) {
+    const params = new URLSearchParams({ lat, lng });
+    if (radiusKm) params.set('radius_km', radiusKm);
+    if (type) params.set('type', type);
+    if (limit) params.set('limit', limit);
+    return this._request('GET', `/markets/nearby?${params.toString()}`);
   }
 
   // ─────────────────────────────────────────────────────────────────
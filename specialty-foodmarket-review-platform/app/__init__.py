@@ -89,10 +89,21 @@ def create_app():
     )
     app.redis_client = redis_client
 
+    # Background workers (sentiment scoring); eager mode runs tasks inline
+    from app.celery_app import make_celery
+    make_celery(app)
+    from app import tasks  # noqa: F401 - registers the @shared_task functions
+
     # Register Blueprints
-    from app.routes import auth_bp, reviews_bp, markets_bp
+    from app.routes import auth_bp, reviews_bp, markets_bp, exports_bp, search_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(markets_bp)
     app.register_blueprint(reviews_bp)
+    app.register_blueprint(exports_bp)
+    app.register_blueprint(search_bp)
+
+    # Register CLI commands
+    from app.cli import register_cli
+    register_cli(app)
 
     return app
@@ -1,36 +1,48 @@
-# Create app/celery_app.py
+# app/celery_app.py
 from celery import Celery
+from flask import has_app_context
+
+# Global celery instance; tasks use @shared_task and bind to it once make_celery has run.
+celery = Celery(__name__)
 
 def make_celery(app):
     """
-    Create a Celery instance that works with Flask's application context.
+    Configure the global Celery instance to work with Flask's application context.
     Think of this as hiring a crew of workers who know how to work with your app.
+
+    Run a worker with:  celery -A celery_worker.celery worker
+    and the periodic jobs in beat_schedule with:  celery -A celery_worker.celery beat
     """
-    celery = Celery(
-        app.import_name,
-        backend=f"redis://{app.config['REDIS_HOST']}:{app.config['REDIS_PORT']}/1",
-        broker=f"redis://{app.config['REDIS_HOST']}:{app.config['REDIS_PORT']}/0"
+    celery.main = app.import_name
+    celery.conf.update(
+        broker_url=app.config['CELERY_BROKER_URL'],
+        result_backend=app.config['CELERY_RESULT_BACKEND'],
+        # Eager mode runs tasks inline in the caller - deterministic for tests and
+        # for local development without a worker.
+        task_always_eager=app.config['CELERY_TASK_ALWAYS_EAGER'],
+        task_eager_propagates=True,
+        task_ignore_result=True,
+        beat_schedule={
+            'leaderboard-reconcile': {
+                'task': 'leaderboard.reconcile',
+                'schedule': app.config['LEADERBOARD_RECONCILE_INTERVAL'],
+            },
+            'leaderboard-publish-variants': {
+                'task': 'leaderboard.publish_variants',
+                'schedule': app.config['LEADERBOARD_VARIANTS_INTERVAL'],
+            },
+        },
     )
-    
+
     class ContextTask(celery.Task):
         """Make celery tasks work inside Flask's context"""
         def __call__(self, *args, **kwargs):
+            if has_app_context():  # eager mode: already inside the request's app context
+                return self.run(*args, **kwargs)
             with app.app_context():
                 return self.run(*args, **kwargs)
-    
-    celery.Task = ContextTask
-    return celery
-
-# In __init__.py, add:
-from app.celery_app import make_celery
-
-celery = None  # Global celery instance
 
-def create_app():
-    # ... existing code ...
-    
-    global celery
-    celery = make_celery(app)
+    celery.Task = ContextTask
+    celery.set_default()
     app.celery = celery
-    
-    # ... rest of function
\ No newline at end of file
+    return celery
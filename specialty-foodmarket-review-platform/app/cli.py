@@ -0,0 +1,255 @@
+"""
+Flask CLI commands (`flask export ...`, `flask reviews ...`, `flask leaderboard ...`, `flask markets ...`,
+`flask users ...`),
+registered in create_app.
+"""
+import click
+from flask.cli import AppGroup, with_appcontext
+from app.services.export_service import EXPORTS, FORMATS, iter_export
+from app.utils.cache import redis_client
+
+reviews_cli = AppGroup('reviews', help='Review maintenance jobs.')
+leaderboard_cli = AppGroup('leaderboard', help='Leaderboard maintenance jobs.')
+markets_cli = AppGroup('markets', help='Market maintenance jobs.')
+users_cli = AppGroup('users', help='User administration.')
+
+
+@click.command('export')
+@click.argument('entity', type=click.Choice(list(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), default='ndjson', show_default=True)
+@click.option('--since-id', type=int, default=0, show_default=True, help='Only rows with id greater than this.')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Output file (default: stdout).')
+@with_appcontext
+def export_cmd(entity, fmt, since_id, output):
+    """Stream ENTITY (markets|reviews) to a file or stdout with constant memory."""
+    for chunk in iter_export(entity, fmt, since_id):
+        output.write(chunk)
+    output.flush()
+
+
+@reviews_cli.command('rescore')
+@click.option('--chunk-size', type=int, default=2000, show_default=True, help='Reviews per keyset chunk / commit.')
+@click.option('--workers', type=int, default=None, help='Scoring processes (default: CPU count).')
+@click.option('--lexicon', type=click.Path(exists=True, dir_okay=False), help='Custom VADER entries, token<TAB>valence per line.')
+@click.option('--resume', is_flag=True, help='Continue after the last committed checkpoint.')
+@click.option('--start-after', type=int, default=0, help='Only review ids greater than this.')
+@click.option('--only-missing', is_flag=True, help='Only reviews without a score (e.g. lost from the pending queue).')
+@click.option('--rebuild/--no-rebuild', default=True, show_default=True, help='Rebuild the leaderboard afterwards.')
+def rescore_cmd(chunk_size, workers, lexicon, resume, start_after, only_missing, rebuild):
+    """Recompute sentiment_score for all reviews, e.g. after a VADER or lexicon change."""
+    from app.services.sentiment_service import RESCORE_CHECKPOINT_KEY, load_lexicon, rescore_reviews
+
+    client = redis_client()
+    if resume:
+        start_after = int(client.get(RESCORE_CHECKPOINT_KEY) or 0)
+        click.echo(f"Resuming after review_id {start_after}")
+
+    progress = None
+    for progress in rescore_reviews(
+        chunk_size=chunk_size,
+        workers=workers,
+        start_after=start_after,
+        lexicon_updates=load_lexicon(lexicon) if lexicon else None,
+        only_missing=only_missing,
+        checkpoint=lambda last_id: client.set(RESCORE_CHECKPOINT_KEY, last_id),
+    ):
+        click.echo(
+            f"{progress['reviews']} reviews ({progress['unique_texts']} distinct texts) "
+            f"up to id {progress['last_id']} - {progress['per_second']:.0f} reviews/s"
+        )
+
+    if progress is None:
+        click.echo("Nothing to rescore.")
+        return
+    client.delete(RESCORE_CHECKPOINT_KEY)  # finished; --resume starts over next time
+    if rebuild:
+        # running sums in the stats hashes were built from the old scores
+        _rebuild_leaderboard()
+
+
+def _rebuild_leaderboard():
+    from app.utils.leaderboard import rebuild_leaderboard
+    if not rebuild_leaderboard():
+        raise click.ClickException("Another rebuild or reconcile is already running; leaderboard not rebuilt.")
+    click.echo("Leaderboard rebuilt.")
+
+
+@reviews_cli.command('import')
+@click.argument('source', type=click.File('r'))
+@click.option('--batch-size', type=int, default=5000, show_default=True, help='Reviews per validated/committed batch.')
+def import_cmd(source, batch_size):
+    """Bulk-import reviews from an NDJSON file (or - for stdin), e.g. a partner dump or `flask export reviews`."""
+    import json
+    from marshmallow import ValidationError
+    from app.services.ingest_service import ingest_reviews
+    from app.validators.validators import ReviewImportSchema
+
+    def flush(lines, batch, bad):
+        first, last = min(lines + list(bad)), max(lines + list(bad))
+        try:
+            if bad:  # nothing is inserted; report the lines that did parse too
+                raise ValidationError(ReviewImportSchema(many=True).validate(batch))
+            result = ingest_reviews(batch)
+        except ValidationError as err:
+            errors = err.messages
+            if isinstance(errors, dict):  # row index -> line number
+                errors = dict(sorted({**{lines[int(i)]: e for i, e in errors.items()}, **bad}.items()))
+            raise click.ClickException(f"Batch of lines {first}-{last} rejected: {errors}")
+        click.echo(f"lines {first}-{last}: {result['inserted']} reviews into {result['markets']} markets")
+        return result['inserted']
+
+    total, lines, batch, bad = 0, [], [], {}
+    for line_no, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            batch.append(json.loads(line))
+            lines.append(line_no)
+        except json.JSONDecodeError as err:
+            bad[line_no] = {'_schema': [f"Invalid JSON: {err.msg}."]}
+        if len(batch) + len(bad) >= batch_size:
+            total += flush(lines, batch, bad)
+            lines, batch, bad = [], [], {}
+    if batch or bad:
+        total += flush(lines, batch, bad)
+    click.echo(f"{total} reviews imported.")
+
+
+@reviews_cli.command('build-lsh')
+@click.option('--chunk-size', type=int, default=2000, show_default=True, help='Reviews per chunk / commit.')
+@click.option('--start-after', type=int, default=0, help='Continue an interrupted build after this review_id.')
+@click.option('--rebuild/--no-rebuild', default=True, show_default=True, help='Rebuild the leaderboard afterwards.')
+def build_lsh_cmd(chunk_size, start_after, rebuild):
+    """(Re)build the near-duplicate index over existing reviews and flag copies of earlier reviews."""
+    from app.services.minhash_service import build_index, reset_index
+
+    if not start_after:
+        reset_index()
+    progress = None
+    for progress in build_index(chunk_size=chunk_size, start_after=start_after):
+        click.echo(f"{progress['reviews']} reviews indexed, {progress['flagged']} flagged, up to id {progress['last_id']}")
+    if progress is None:
+        click.echo("No reviews to index.")
+        return
+    if rebuild:
+        # flagged reviews drop out of the stats
+        _rebuild_leaderboard()
+
+
+@leaderboard_cli.command('rebuild')
+def leaderboard_rebuild_cmd():
+    """Rebuild the leaderboard and per-market stats from the database."""
+    _rebuild_leaderboard()
+
+
+@leaderboard_cli.command('reconcile')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Markets per aggregate query.')
+@click.option('--dry-run', is_flag=True, help='Only report drift, repair nothing.')
+def leaderboard_reconcile_cmd(chunk_size, dry_run):
+    """Repair markets whose Redis stats or board scores drifted from the database."""
+    from app.utils.leaderboard import reconcile_leaderboard
+    metrics = reconcile_leaderboard(chunk_size=chunk_size, dry_run=dry_run)
+    if metrics is None:
+        click.echo("A rebuild or reconcile is already running.")
+        return
+    click.echo(
+        f"{metrics['checked']} markets checked, {metrics['drifted']} drifted "
+        f"(orphan {metrics['orphan']}, missing {metrics['missing']}, stats {metrics['stats']}, "
+        f"board {metrics['board']}), {metrics['repaired']} repaired in {metrics['duration_ms']} ms"
+    )
+
+
+@leaderboard_cli.command('weights')
+@click.argument('variant')
+@click.option('--avg-rating', type=float, help='Weight of the average rating.')
+@click.option('--avg-sentiment', type=float, help='Weight of the average sentiment.')
+@click.option('--review-ct', type=float, help='Weight of the (log) review count.')
+@click.option('--delete', is_flag=True, help='Remove the variant and its board.')
+def leaderboard_weights_cmd(variant, avg_rating, avg_sentiment, review_ct, delete):
+    """Create, update or delete weight VARIANT; unset weights use the defaults."""
+    from app.utils.leaderboard import delete_variant, load_weights, set_weights
+    if delete:
+        delete_variant(variant)
+        click.echo(f"Variant {variant} deleted.")
+        return
+    given = {'avg_rating': avg_rating, 'avg_sentiment': avg_sentiment, 'review_ct': review_ct}
+    try:
+        set_weights(variant, **{k: v for k, v in given.items() if v is not None})
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    click.echo(f"{variant}: {load_weights(variant)}")
+
+
+@leaderboard_cli.command('publish')
+@click.argument('variants', nargs=-1)
+def leaderboard_publish_cmd(variants):
+    """Recompute the boards of VARIANTS (default: all) from the stats hashes."""
+    from app.utils.leaderboard import publish_variants
+    published = publish_variants(list(variants) or None)
+    if not published:
+        click.echo("No variants registered.")
+    for variant, ranked in published.items():
+        click.echo(f"{variant}: {ranked} markets ranked")
+
+
+@markets_cli.command('reindex-suggest')
+def reindex_suggest_cmd():
+    """Rebuild the market name typeahead index from the markets table."""
+    from app.services.suggest_service import rebuild_suggest_index
+    click.echo(f"{rebuild_suggest_index()} markets indexed.")
+
+
+@markets_cli.command('reindex-geo')
+def reindex_geo_cmd():
+    """Rebuild the Redis GEO sets behind /markets/nearby from the markets table."""
+    from app.services.geo_service import rebuild_geo_index
+    click.echo(f"{rebuild_geo_index()} markets indexed.")
+
+
+@markets_cli.command('dedupe-report')
+@click.option('--threshold', type=float, default=None, help='Minimum trigram similarity (default: DEDUPE_THRESHOLD).')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Output file (default: stdout).')
+def dedupe_report_cmd(threshold, output):
+    """List pairs of active markets that are probably the same place, most similar first (TSV)."""
+    from sqlalchemy import select
+    from app.database import db
+    from app.models.models import Market
+    from app.services.dedupe_service import DEDUPE_THRESHOLD, backfill_dedupe_keys, duplicate_pairs
+
+    filled = backfill_dedupe_keys()
+    if filled:
+        click.echo(f"Computed dedupe keys for {filled} markets.", err=True)
+    pairs = duplicate_pairs(threshold if threshold is not None else DEDUPE_THRESHOLD)
+    ids = {i for a, b, _ in pairs for i in (a, b)}
+    names = dict(db.session.execute(
+        select(Market.market_id, Market.name + ', ' + Market.address).where(Market.market_id.in_(ids))
+    ).all()) if ids else {}
+    output.write("similarity\tid_a\tmarket_a\tid_b\tmarket_b\n")
+    for a, b, sim in pairs:
+        output.write(f"{sim}\t{a}\t{names.get(a, '')}\t{b}\t{names.get(b, '')}\n")
+    output.flush()
+    click.echo(f"{len(pairs)} likely duplicate pairs.", err=True)
+
+
+@users_cli.command('set-role')
+@click.argument('username')
+@click.argument('role')
+def set_role_cmd(username, role):
+    """Give USERNAME the ROLE (e.g. admin, or partner for /export); applies from their next login or token refresh."""
+    from app.database import db
+    from app.models.models import User
+
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named '{username}'.")
+    user.role = role
+    db.session.commit()
+    click.echo(f"{username} is now {role}.")
+
+
+def register_cli(app):
+    app.cli.add_command(export_cmd)
+    app.cli.add_command(reviews_cli)
+    app.cli.add_command(leaderboard_cli)
+    app.cli.add_command(markets_cli)
+    app.cli.add_command(users_cli)
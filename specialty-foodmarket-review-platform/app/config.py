@@ -74,6 +74,21 @@ class RedisConfig:
         if not isinstance(self.REDIS_PORT, int) or self.REDIS_PORT <= 0:
             raise ValueError("REDIS PORT must be a positive integer")
 
+class CeleryConfig:
+    def __init__(self, redis: RedisConfig):
+        redis_base = f"redis://{redis.REDIS_HOST}:{redis.REDIS_PORT}"
+        self.CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', f"{redis_base}/0")
+        self.CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', f"{redis_base}/1")
+        # Run tasks inline instead of on a worker (tests, or dev without a worker running)
+        self.CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'false').lower() in ('1', 'true', 'yes')
+        # Periodic jobs run by `celery beat`, in seconds
+        self.LEADERBOARD_RECONCILE_INTERVAL = int(os.environ.get('LEADERBOARD_RECONCILE_INTERVAL', 3600))
+        self.LEADERBOARD_VARIANTS_INTERVAL = int(os.environ.get('LEADERBOARD_VARIANTS_INTERVAL', 900))
+
+    def validate(self):
+        if not self.CELERY_BROKER_URL:
+            raise ValueError("CELERY_BROKER_URL is required")
+
 class Config:
     """Base configuration class composing all subsystem configurations."""
     def __init__(self):
@@ -81,6 +96,7 @@ class Config:
         self.security = SecurityConfig()
         self.database = DatabaseConfig()
         self.redis = RedisConfig()
+        self.celery = CeleryConfig(self.redis)
         # JWT Configuration
         self.JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', self.security.SECRET_KEY)
     
@@ -89,6 +105,7 @@ class Config:
         self.security.validate()
         self.database.validate()
         self.redis.validate()
+        self.celery.validate()
 
     def to_flask_config(self):
         """Return a dictionary of settings for Flask app.config"""
@@ -106,12 +123,22 @@ class Config:
             'REDIS_HOST': self.redis.REDIS_HOST,
             'REDIS_PORT': self.redis.REDIS_PORT,
             'REDIS_DB': self.redis.REDIS_DB,
+            'CELERY_BROKER_URL': self.celery.CELERY_BROKER_URL,
+            'CELERY_RESULT_BACKEND': self.celery.CELERY_RESULT_BACKEND,
+            'CELERY_TASK_ALWAYS_EAGER': self.celery.CELERY_TASK_ALWAYS_EAGER,
+            'LEADERBOARD_RECONCILE_INTERVAL': self.celery.LEADERBOARD_RECONCILE_INTERVAL,
+            'LEADERBOARD_VARIANTS_INTERVAL': self.celery.LEADERBOARD_VARIANTS_INTERVAL,
             'JWT_SECRET_KEY': self.JWT_SECRET_KEY,
         }
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    def __init__(self):
+        super().__init__()
+        # The local setup runs no worker: score reviews inline unless the env says otherwise
+        if 'CELERY_TASK_ALWAYS_EAGER' not in os.environ:
+            self.celery.CELERY_TASK_ALWAYS_EAGER = True
 
 
 class ProductionConfig(Config):
@@ -6,7 +6,7 @@ class SoftDeleteMixin:
     
     def soft_delete(self):
         """Mark the row as inactive instead of hard-deleting it."""
-        from datetime import datetime
+        from datetime import datetime, timezone
         self.is_active  = False
-        self.deleted_at = datetime.now(datetime.timezone.utc)
+        self.deleted_at = datetime.now(timezone.utc)
         
@@ -9,12 +9,20 @@ class Market(SoftDeleteMixin, db.Model):
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(255), nullable=False)
     type = db.Column(db.String(50), nullable=False)
+    # client-supplied WGS84 coordinates; indexed for radius queries in Redis (geo_service)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    # normalized name + address for fuzzy duplicate detection (dedupe_service.dedupe_key)
+    dedupe_key = db.Column(db.String(400))
 
+    # Loaded on access, so market queries don't LEFT JOIN market_accounts on every row.
+    # No endpoint serializes it yet; one that does over many markets should add
+    # options(joinedload(Market.account)) to its query rather than load it per market.
     account = db.relationship(
         'MarketAccount',
         back_populates='market',
         uselist=False,
-        lazy='joined',
+        lazy='select',
         cascade='all, delete-orphan'
     )
 
@@ -26,6 +34,16 @@ class Market(SoftDeleteMixin, db.Model):
             unique=True,
             postgresql_where=db.text("is_active = TRUE"),
         ),
+        # keyset pagination for the market listing: WHERE is_active [AND type = ?] AND market_id > ?
+        db.Index("ix_markets_active_type_id", "is_active", "type", "market_id"),
+        db.Index("ix_markets_active_id", "is_active", "market_id"),
+        # trigram similarity lookups (pg_trgm); a plain index elsewhere
+        db.Index(
+            "ix_markets_dedupe_key_trgm",
+            "dedupe_key",
+            postgresql_using="gin",
+            postgresql_ops={"dedupe_key": "gin_trgm_ops"},
+        ),
     )
 
     @classmethod
@@ -61,12 +79,18 @@ class Review(db.Model):
     comment = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
     sentiment_score = db.Column(db.Float)
+    # set when the text near-duplicates an earlier review (minhash_service); such
+    # reviews are kept but left out of market stats and leaderboards
+    duplicate_of = db.Column(db.Integer)
 
     market = db.relationship('Market', backref=db.backref('reviews', lazy=True))
     user = db.relationship('User', backref=db.backref('reviews', lazy=True))
 
     __table_args__ = (
         db.CheckConstraint("rating BETWEEN 1 AND 5", name="chk_rating_1_5"),
+        # keyset pagination of review listings: newest first, ties broken by review_id
+        db.Index("ix_reviews_market_ts_id", market_id, timestamp.desc(), review_id),
+        db.Index("ix_reviews_user_ts_id", user_id, timestamp.desc(), review_id),
     )
 
 # Market Account Model
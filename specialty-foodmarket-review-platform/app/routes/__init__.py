@@ -1,5 +1,7 @@
 from .auth import auth_bp
 from .markets import markets_bp
 from .reviews import reviews_bp
+from .exports import exports_bp
+from .search import search_bp
 
-__all__ = ['auth_bp', 'markets_bp', 'reviews_bp']
\ No newline at end of file
+__all__ = ['auth_bp', 'markets_bp', 'reviews_bp', 'exports_bp', 'search_bp']
\ No newline at end of file
@@ -0,0 +1,26 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.services.export_service import EXPORTS, FORMATS, iter_export
+from app.utils.decorators import requires_scopes
+
+exports_bp = Blueprint('exports', __name__)
+
+
+@exports_bp.route('/export/<entity>', methods=['GET'])
+@requires_scopes('export')
+def export(entity):
+    """Stream every market or review as NDJSON (default) or CSV.
+
+    Query params: format (ndjson|csv), since_id (resume after this id).
+    """
+    if entity not in EXPORTS:
+        return jsonify({'error': f"Unknown export '{entity}'."}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    since_id = request.args.get('since_id', 0, type=int)
+
+    return Response(
+        stream_with_context(iter_export(entity, fmt, since_id)),
+        mimetype=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={entity}.{fmt}'},
+    )
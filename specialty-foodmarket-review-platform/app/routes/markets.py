@@ -5,29 +5,55 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from app.database import db
 from app.models.models import Market, Review
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from app.utils.cache import redis_cache
-from app.validators.validators import MarketSchema
+from app.utils.cache import redis_cache, invalidate_tags
+from app.utils.decorators import requires_role
+from app.validators.validators import (
+    MarketSchema, MarketListQuerySchema, LeaderboardQuerySchema, LeaderboardRankQuerySchema, NearbyQuerySchema,
+    SuggestQuerySchema, TrendingQuerySchema,
+)
+from app.services.market_service import (
+    cache_market_summaries, details_key, hydrate_markets, list_market_summaries, market_summary,
+)
+from app.services.dedupe_service import find_duplicates
+from app.services.geo_service import index_location, nearby, unindex_location
+from app.services.suggest_service import index_market, suggest, unindex_market
+from app.utils.leaderboard import (
+    SENTIMENT_BINS, VARIANTS_KEY, board_key, remove_market, sentiment_bin_edges, sentiment_bin_expr, stats_key,
+    trending_board, variant_board_key,
+)
 
-analyzer = SentimentIntensityAnalyzer()
 markets_bp = Blueprint('markets', __name__)
 
+def _list_cache_key():
+    """One cache entry per (type, cursor, limit) page of the market listing."""
+    args = request.args
+    return f"markets:list:{args.get('type', 'all')}:{args.get('cursor', 0)}:{args.get('limit', 50)}"
+
+
 @markets_bp.route('/', methods=['GET'])
-@redis_cache(lambda: 'markets_all', ttl=300) #Note- whenver you write a market or soft-delete one, remember to redis_client.delete('markets_all)
+@redis_cache(_list_cache_key, ttl=300, soft_ttl=240, tags=['markets:list'], local_ttl=5)
 def get_all_markets():
-    markets = db.session.execute(select(Market)).scalars().all()
-    return jsonify([{
-        'id': market.market_id,
-        'name': market.name,
-        'address': market.address,
-        'type': market.type
-    } for market in markets]), 200
+    """List active markets, keyset-paginated on market_id.
+
+    Query params: limit (1-200, default 50), cursor (last market_id seen), type.
+    """
+    try:
+        args = MarketListQuerySchema().load(request.args)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+
+    markets, next_cursor = list_market_summaries(args['limit'], args['cursor'], args['type'])
+    return jsonify({'markets': markets, 'next_cursor': next_cursor}), 200
 
 
 @markets_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_market():
-    """Create a new market. Requires authentication."""
+    """Create a new market. Requires authentication.
+
+    Markets whose name and address look like an existing market's are refused with
+    409 and the likely duplicates as `candidates`; send force=true to create anyway.
+    """
     schema = MarketSchema()
     try:
         data = schema.load(request.json)
@@ -38,7 +64,16 @@ def create_market():
     address = data.get('address')
     market_type = data.get('type')
 
-    new_market = Market(name=name, address=address, type=market_type)
+    if not data['force']:
+        candidates = find_duplicates(name, address)
+        if candidates:
+            return jsonify({
+                'error': 'This market looks like an existing one. Send force=true to create it anyway.',
+                'candidates': candidates,
+            }), 409
+
+    new_market = Market(name=name, address=address, type=market_type,
+                        latitude=data.get('latitude'), longitude=data.get('longitude'))
 
     try:
         db.session.add(new_market)
@@ -47,35 +82,183 @@ def create_market():
         db.session.rollback()
         return jsonify({'error': 'A market with this name and address already exists.'}), 409
 
-    # Invalidate the markets cache so the new market appears immediately
-    redis_client = current_app.redis_client
-    redis_client.delete('markets_all')
+    # Invalidate every cached listing page so the new market appears immediately
+    invalidate_tags('markets:list', f'market:{new_market.market_id}')
+    cache_market_summaries([market_summary(new_market)])
+    index_market(new_market.market_id, new_market.name)
+    index_location(new_market.market_id, new_market.type, new_market.latitude, new_market.longitude)
 
     return jsonify({
         'message': 'Market created successfully',
-        'market': {
-            'id': new_market.market_id,
-            'name': new_market.name,
-            'address': new_market.address,
-            'type': new_market.type
-        }
+        'market': market_summary(new_market)
     }), 201
 
 
+@markets_bp.route('/markets/suggest', methods=['GET'])
+def suggest_markets():
+    """As-you-type market name suggestions, most popular first.
+
+    Query params: prefix (matches the start of any word of the name), limit (1-20, default 10).
+    """
+    try:
+        args = SuggestQuerySchema().load(request.args)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+    return jsonify({'suggestions': suggest(args['prefix'], args['limit'])}), 200
+
+
+@markets_bp.route('/markets/nearby', methods=['GET'])
+def nearby_markets():
+    """Markets within a radius of a point, nearest first.
+
+    Query params: lat, lng, radius_km (default 5, max 100), type, limit (1-100, default 20).
+    Only markets created with coordinates can be found.
+    """
+    try:
+        args = NearbyQuerySchema().load(request.args)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+
+    hits = nearby(args['lat'], args['lng'], args['radius_km'], args['type'], args['limit'])
+    details = hydrate_markets(market_id for market_id, _ in hits)
+    return jsonify({'markets': [
+        {**details.get(market_id, {'id': market_id}), 'distance_km': round(distance, 3)}
+        for market_id, distance in hits
+    ]}), 200
+
+
+@markets_bp.route('/<int:market_id>', methods=['DELETE'])
+@requires_role('admin')
+def delete_market(market_id):
+    """Soft-delete a market and take it off the leaderboards. Admin only."""
+    market = db.session.get(Market, market_id)
+    if market is None or not market.is_active:
+        return jsonify({'error': 'Market not found'}), 404
+    market.soft_delete()
+    db.session.commit()
+
+    remove_market(market_id)
+    unindex_market(market_id, market.name)
+    unindex_location(market_id)
+    current_app.redis_client.delete(details_key(market_id))
+    invalidate_tags('markets:list', f'market:{market_id}', f'reviews:market:{market_id}')
+    return jsonify({'message': 'Market deleted successfully'}), 200
+
+
 @markets_bp.route('/<int:market_id>/sentiment', methods=['GET'])
 def get_sentiment(market_id):
-    reviews = db.session.execute(select(Review).where(Review.market_id == market_id)).scalars().all()
-    if not reviews:
-        return jsonify({'error': 'No reviews found'}), 404
+    """Average sentiment and its distribution, from the running aggregates in O(1).
+
+    Falls back to one SQL aggregate when the market has no stats hash yet
+    (e.g. Redis was flushed); reviews without a score are ignored.
+    """
+    stats = current_app.redis_client.hgetall(stats_key(market_id))
+    count = int(float(stats.get(b'count', 0)))
+    if count:
+        avg_sentiment = float(stats.get(b'sent_sum', 0)) / count
+        hist = [int(stats.get(f'hist:{i}'.encode(), 0)) for i in range(SENTIMENT_BINS)]
+    else:
+        avg_sentiment, count = db.session.execute(
+            select(db.func.avg(Review.sentiment_score), db.func.count(Review.sentiment_score))
+            .where(Review.market_id == market_id, Review.duplicate_of.is_(None))
+        ).one()
+        if not count:
+            return jsonify({'error': 'No reviews found'}), 404
+        bin_col = sentiment_bin_expr(Review.sentiment_score)
+        hist = [0] * SENTIMENT_BINS
+        for bin_idx, n in db.session.execute(
+            select(bin_col, db.func.count())
+            .where(Review.market_id == market_id, Review.sentiment_score.isnot(None), Review.duplicate_of.is_(None))
+            .group_by(bin_col)
+        ):
+            hist[bin_idx] = n
 
-    avg_sentiment = sum(r.sentiment_score for r in reviews) / len(reviews)
-    return jsonify({'market_id': market_id, 'average_sentiment': avg_sentiment, 'reviews_count': len(reviews)}), 200
+    return jsonify({
+        'market_id': market_id,
+        'average_sentiment': avg_sentiment,
+        'reviews_count': count,
+        'distribution': [
+            {'from': lo, 'to': hi, 'count': n}
+            for (lo, hi), n in zip(sentiment_bin_edges(), hist)
+        ],
+    }), 200
 
 @markets_bp.route('/leaderboard', methods=['GET'])
+@redis_cache(None, ttl=5, local_ttl=2) # short TTLs instead of invalidating on every review
 def get_leaderboard():
+    """One page of the global (or ?type=) leaderboard with market details hydrated.
+
+    Query params: offset (default 0), limit (1-200, default 50), type, variant (a published
+    weight variant, for experiments; global board only).
+    """
+    try:
+        args = LeaderboardQuerySchema().load(request.args)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+
+    if args['variant']:
+        if not current_app.redis_client.sismember(VARIANTS_KEY, args['variant']):
+            return jsonify({'error': 'Unknown leaderboard variant'}), 404
+        key = variant_board_key(args['variant'])
+    else:
+        key = board_key(args['type'])
+    return jsonify(_board_page(key, args['offset'], args['limit'])), 200
+
+
+@markets_bp.route('/leaderboard/trending', methods=['GET'])
+@redis_cache(None, ttl=30, local_ttl=5)
+def get_trending():
+    """One page of the trending board: review points over the last ?window= (7d or 30d),
+    with older days decayed, so recent momentum outranks all-time standing.
+
+    Query params: window (default 7d), offset (default 0), limit (1-200, default 50).
+    """
+    try:
+        args = TrendingQuerySchema().load(request.args)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+
+    page = _board_page(trending_board(args['window']), args['offset'], args['limit'])
+    return jsonify({'window': args['window'], **page}), 200
+
+
+def _board_page(key, offset, limit):
+    """Slice a ranking ZSET and hydrate the market details for that page."""
     redis_client = current_app.redis_client  # Access redis_client via current_app
-    leaderboard = redis_client.zrevrange('leaderboard', 0, -1, withscores=True)
-    leaderboard_list = [
-        {'id': int(market_id), 'score': score} for market_id, score in leaderboard
-    ]
-    return jsonify({'leaderboard': leaderboard_list}), 200
\ No newline at end of file
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    pipe.zcard(key)
+    leaderboard, total = pipe.execute()
+
+    details = hydrate_markets(market_id for market_id, _ in leaderboard)
+    leaderboard_list = []
+    for rank, (market_id, score) in enumerate(leaderboard, start=offset + 1):
+        market = details.get(int(market_id), {'id': int(market_id)})
+        leaderboard_list.append({**market, 'score': score, 'rank': rank})
+    next_offset = offset + limit if offset + limit < total else None
+    return {'leaderboard': leaderboard_list, 'total': total, 'next_offset': next_offset}
+
+
+@markets_bp.route('/leaderboard/rank/<int:market_id>', methods=['GET'])
+def get_leaderboard_rank(market_id):
+    """1-based rank and score of one market on the global (or ?type=) leaderboard."""
+    try:
+        args = LeaderboardRankQuerySchema().load(request.args)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+    market_type = args['type']
+    key = board_key(market_type)
+    pipe = current_app.redis_client.pipeline(transaction=False)
+    pipe.zrevrank(key, market_id)
+    pipe.zscore(key, market_id)
+    pipe.zcard(key)
+    rank, score, total = pipe.execute()
+    if rank is None:
+        return jsonify({'error': 'Market is not ranked'}), 404
+    return jsonify({
+        'market_id': market_id,
+        'type': market_type,
+        'rank': rank + 1,
+        'score': score,
+        'total': total,
+    }), 200
@@ -2,15 +2,50 @@ from flask import Blueprint, request, jsonify, current_app
 from marshmallow import ValidationError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import select
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from app.database import db
-from app.models.models import Review
-from app.utils.leaderboard import update_leaderboard
-from app.validators.validators import ReviewSchema
+from app.models.models import Market, Review
+from app.services.ingest_service import INGEST_MAX_ROWS, ingest_reviews
+from app.services.minhash_service import find_duplicate, index_review, is_short, signature, unindex_review
+from app.services.review_service import list_reviews
+from app.tasks import enqueue_sentiment
+from app.utils.cache import invalidate_tags, redis_cache
+from app.utils.decorators import requires_role
+from app.utils.leaderboard import remove_review, replace_review
+from app.validators.validators import ReviewListQuerySchema, ReviewSchema
 
-analyzer = SentimentIntensityAnalyzer()
 reviews_bp = Blueprint('reviews', __name__)
 
+
+def _first_page_cache_key(market_id):
+    """Only the first page of a market's reviews is cached; cursor pages are index range scans anyway."""
+    if request.args.get('cursor'):
+        return None
+    return f"reviews:market:{market_id}:first:{request.args.get('limit', 20)}"
+
+
+def _list_response(**owner):
+    try:
+        args = ReviewListQuerySchema().load(request.args)
+        reviews, next_cursor = list_reviews(args['limit'], args['cursor'], **owner)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+    except ValueError as err:
+        return jsonify({'error': {'cursor': [str(err)]}}), 400
+    return jsonify({'reviews': reviews, 'next_cursor': next_cursor}), 200
+
+
+@reviews_bp.route('/<int:market_id>/reviews', methods=['GET'])
+@redis_cache(_first_page_cache_key, ttl=300, tags=lambda market_id: [f'reviews:market:{market_id}'], local_ttl=5)
+def get_market_reviews(market_id):
+    """A market's reviews, newest first. Query params: limit (1-100, default 20), cursor."""
+    return _list_response(market_id=market_id)
+
+
+@reviews_bp.route('/users/<int:user_id>/reviews', methods=['GET'])
+def get_user_reviews(user_id):
+    """A user's reviews, newest first. Query params: limit (1-100, default 20), cursor."""
+    return _list_response(user_id=user_id)
+
 @reviews_bp.route('/<int:market_id>/review', methods=['POST'])
 @jwt_required()
 def post_review(market_id):
@@ -19,6 +54,9 @@ def post_review(market_id):
         data = schema.load(request.json)
     except ValidationError as err:
         return jsonify(err.messages), 400
+    market = db.session.get(Market, market_id)
+    if market is None or not market.is_active:
+        return jsonify({'error': 'Market not found'}), 404
     user_id = get_jwt_identity()
     data = request.json
     review_text = data.get('review')
@@ -27,11 +65,144 @@ def post_review(market_id):
     if not review_text or rating is None:
         return jsonify({'error': 'Review text and rating are required.'}), 400
 
-    sentiment_score = analyzer.polarity_scores(review_text)['compound']
+    # Copy-pasted / templated text is flagged against earlier reviews via the LSH buckets;
+    # flagged reviews are stored but never counted in the market's stats.
+    sig = signature(review_text)
+    duplicate_of = find_duplicate(sig, author=int(user_id) if is_short(review_text) else None)
 
-    new_review = Review(market_id=market_id, user_id=user_id, comment=review_text, rating=rating, sentiment_score=sentiment_score)
+    # Stored with a pending (NULL) score; a Celery worker scores it in a batch and
+    # updates the leaderboard, so the request doesn't wait on VADER or Redis stats.
+    new_review = Review(market_id=market_id, user_id=user_id, comment=review_text, rating=rating,
+                        sentiment_score=None, duplicate_of=duplicate_of)
     db.session.add(new_review)
     db.session.commit()
-    update_leaderboard(market_id, rating, sentiment_score)
+    index_review(new_review.review_id, sig)
+    invalidate_tags(f'reviews:market:{market_id}')
+    enqueue_sentiment(new_review.review_id)
+
+    return jsonify({
+        'message': 'Review posted successfully',
+        'review_id': new_review.review_id,
+        'sentiment_status': 'pending',
+    }), 201
+
+
+def _owned_review(review_id):
+    """The caller's review, row-locked for the stats delta; (review, error response)."""
+    review = db.session.execute(
+        select(Review, Market.type)
+        .join(Market, Market.market_id == Review.market_id)
+        .where(Review.review_id == review_id)
+        .with_for_update(of=Review)
+    ).first()
+    if review is None:
+        return None, (jsonify({'error': 'Review not found'}), 404)
+    if str(review.Review.user_id) != str(get_jwt_identity()):
+        return None, (jsonify({'error': 'You can only change your own reviews.'}), 403)
+    return review, None
+
+
+def _review_day(review):
+    return review.timestamp.date() if review.timestamp else None
+
+
+@reviews_bp.route('/review/<int:review_id>', methods=['PUT'])
+@jwt_required()
+def update_review(review_id):
+    """Edit your review's text and/or rating.
+
+    A rating-only edit applies the exact delta to the market's stats. A new text
+    needs a new sentiment score (and a new duplicate check): the old contribution is
+    subtracted now and the review goes back through the scoring queue, which adds it
+    again unless the new text is a near-duplicate.
+    """
+    try:
+        data = ReviewSchema(partial=True).load(request.json or {})
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+    if not data:
+        return jsonify({'error': 'Nothing to update; send review and/or rating.'}), 400
+
+    row, error = _owned_review(review_id)
+    if error:
+        return error
+    review, market_type = row.Review, row.type
+    old_rating, old_sentiment = review.rating, review.sentiment_score
+    rescore = 'review' in data and data['review'] != review.comment
+    # a pending review (sentiment_score NULL) isn't in the stats yet - the scorer reads
+    # the edited row - and a flagged duplicate never is: nothing to adjust for either
+    counted = old_sentiment is not None and review.duplicate_of is None
+
+    review.rating = data.get('rating', review.rating)
+    if rescore:
+        sig = signature(data['review'])
+        review.comment = data['review']
+        review.sentiment_score = None
+        review.duplicate_of = find_duplicate(
+            sig, exclude=review.review_id, author=review.user_id if is_short(data['review']) else None,
+        )
+    db.session.commit()
+    if rescore:
+        unindex_review(review.review_id)
+        index_review(review.review_id, sig)
+    invalidate_tags(f'reviews:market:{review.market_id}')
+
+    if counted:
+        if rescore:
+            remove_review(review.market_id, old_rating, old_sentiment, market_type, _review_day(review))
+        elif review.rating != old_rating:
+            replace_review(review.market_id, (old_rating, old_sentiment), (review.rating, old_sentiment),
+                           market_type, _review_day(review))
+    if rescore:
+        enqueue_sentiment(review.review_id)
+
+    return jsonify({
+        'message': 'Review updated successfully',
+        'review_id': review.review_id,
+        'sentiment_status': 'pending' if review.sentiment_score is None else 'scored',
+    }), 200
+
+
+@reviews_bp.route('/review/<int:review_id>', methods=['DELETE'])
+@jwt_required()
+def delete_review(review_id):
+    """Delete your review and subtract it from the market's stats."""
+    row, error = _owned_review(review_id)
+    if error:
+        return error
+    review, market_type = row.Review, row.type
+    market_id, rating, sentiment, day = review.market_id, review.rating, review.sentiment_score, _review_day(review)
+    counted = sentiment is not None and review.duplicate_of is None
+    db.session.delete(review)
+    db.session.commit()
+    unindex_review(review_id)
+    invalidate_tags(f'reviews:market:{market_id}')
+
+    if counted:
+        remove_review(market_id, rating, sentiment, market_type, day)
+    return jsonify({'message': 'Review deleted successfully'}), 200
 
-    return jsonify({'message': 'Review posted successfully'}), 201
+
+@reviews_bp.route('/reviews/import', methods=['POST'])
+@requires_role('admin')
+def import_reviews():
+    """Bulk-insert reviews (partner migrations). Admin only.
+
+    Body: a JSON array of {market_id, user_id, review, rating, timestamp?}, at most
+    INGEST_MAX_ROWS. All-or-nothing: any invalid row rejects the batch with errors
+    keyed by row index. Sentiment is scored inline, so imported reviews are never pending.
+    Imported reviews are neither checked for near-duplicates nor added to the LSH index;
+    run `flask reviews build-lsh` after an import to flag and index them.
+    """
+    rows = request.get_json(silent=True)
+    if isinstance(rows, dict):
+        rows = rows.get('reviews')
+    if not isinstance(rows, list):
+        return jsonify({'error': 'Expected a JSON array of reviews.'}), 400
+    if len(rows) > INGEST_MAX_ROWS:
+        return jsonify({'error': f'At most {INGEST_MAX_ROWS} reviews per request.'}), 413
+    try:
+        result = ingest_reviews(rows)
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+    return jsonify({'message': 'Reviews imported successfully', **result}), 201
@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify, request
+from marshmallow import ValidationError
+from app.services.search_service import search as run_search
+from app.utils.cache import redis_cache
+from app.validators.validators import SearchQuerySchema
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('/search', methods=['GET'])
+@redis_cache(None, ttl=60, local_ttl=5) # short TTL: results aren't invalidated on writes
+def search():
+    """Ranked full-text search over markets (name, address) or review comments.
+
+    Query params: q, scope (markets|reviews, default markets), limit (1-50, default 20), cursor.
+    """
+    try:
+        args = SearchQuerySchema().load(request.args)
+        results, next_cursor = run_search(args['q'], args['scope'], args['limit'], args['cursor'])
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+    except ValueError as err:
+        return jsonify({'error': {'cursor': [str(err)]}}), 400
+    return jsonify({'results': results, 'next_cursor': next_cursor}), 200
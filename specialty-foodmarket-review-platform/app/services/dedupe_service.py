@@ -0,0 +1,209 @@
+"""
+Fuzzy duplicate detection for markets.
+
+Every market stores a dedupe_key: name and address lowercased, accents
+and punctuation stripped and common abbreviations spelled out, so
+"Russo's Italian Mkt, 123 Federal Hill Rd" and "Russos Italian Market,
+123 Federal Hill Road" share a key. Near-misses are found by trigram
+similarity (|shared trigrams| / |all trigrams|, as pg_trgm defines it),
+and candidates whose house numbers differ are dropped:
+
+- PostgreSQL: a pg_trgm GIN index on markets.dedupe_key (migration
+  c3f8e2a7b5d1) answers `dedupe_key % :key` without a scan.
+- Elsewhere: an in-process trigram -> market ids index, rebuilt after
+  writes to markets, gives the same candidates.
+"""
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from sqlalchemy import and_, event, inspect, select, update
+from sqlalchemy.orm import aliased
+from app.database import db
+from app.models.models import Market
+from app.services.market_service import MARKET_SUMMARY_COLUMNS, market_summary
+
+DEDUPE_THRESHOLD = 0.5  # minimum similarity reported as a possible duplicate
+DEDUPE_CANDIDATES = 5
+
+_ABBREVIATIONS = {
+    'mkt': 'market', 'mkts': 'markets', 'st': 'street', 'rd': 'road', 'ave': 'avenue', 'av': 'avenue',
+    'blvd': 'boulevard', 'dr': 'drive', 'ln': 'lane', 'hwy': 'highway', 'sq': 'square', 'pl': 'place',
+    'n': 'north', 's': 'south', 'e': 'east', 'w': 'west', 'co': 'company', 'bros': 'brothers', '&': 'and',
+}
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+
+
+def dedupe_key(name: str, address: str) -> str:
+    text = unicodedata.normalize('NFKD', f"{name} {address}")
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower().replace("'", '')
+    return ' '.join(_ABBREVIATIONS.get(t, t) for t in _TOKEN_RE.findall(text))
+
+
+def trigrams(key: str) -> set[str]:
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta or tb else 0.0
+
+
+def _numbers(key: str) -> set[str]:
+    return {t for t in key.split() if t.isdigit()}
+
+
+def _compatible(a: str, b: str) -> bool:
+    """House numbers must agree: "12 Main Street" and "14 Main Street" are neighbours, not duplicates.
+
+    One side may carry numbers the other lacks (a ZIP code, a unit), so the
+    numbers of one key only have to be a subset of the other's.
+    """
+    na, nb = _numbers(a), _numbers(b)
+    return na <= nb or nb <= na
+
+
+def find_duplicates(name: str, address: str, limit: int = DEDUPE_CANDIDATES, threshold: float = DEDUPE_THRESHOLD):
+    """Active markets that look like (name, address): summary dicts with 'similarity', best first."""
+    key = dedupe_key(name, address)
+    if db.engine.dialect.name == 'postgresql':
+        sim = db.func.similarity(Market.dedupe_key, key)
+        rows = db.session.execute(
+            select(*MARKET_SUMMARY_COLUMNS, Market.dedupe_key, sim.label('similarity'))
+            .where(Market.is_active == db.true(), Market.dedupe_key.op('%')(key), sim >= threshold)
+            .order_by(sim.desc())
+            .limit(limit * 4)
+        ).all()
+        return [
+            {**market_summary(row), 'similarity': round(row.similarity, 3)}
+            for row in rows if _compatible(key, row.dedupe_key)
+        ][:limit]
+
+    index = _local_index()
+    hits = [(m, s) for m, s in index.query(key, threshold) if _compatible(key, index.keys[m])][:limit]
+    rows = {row.market_id: row for row in db.session.execute(
+        select(*MARKET_SUMMARY_COLUMNS).where(Market.market_id.in_([m for m, _ in hits]))
+    )}
+    return [{**market_summary(rows[m]), 'similarity': round(s, 3)} for m, s in hits if m in rows]
+
+
+def backfill_dedupe_keys(chunk_size: int = 1000) -> int:
+    """Compute dedupe_key for markets written outside the ORM (e.g. raw SQL loads); returns rows updated."""
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            select(Market.market_id, Market.name, Market.address)
+            .where(Market.dedupe_key.is_(None))
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return updated
+        db.session.execute(update(Market), [
+            {'market_id': r.market_id, 'dedupe_key': dedupe_key(r.name, r.address)} for r in rows
+        ])
+        db.session.commit()
+        updated += len(rows)
+
+
+def duplicate_pairs(threshold: float = DEDUPE_THRESHOLD):
+    """Every pair of active markets at least `threshold` similar: (id_a, id_b, similarity), best first.
+
+    PostgreSQL does it as one self-join on the trigram index; elsewhere each market
+    is looked up in the in-process index. Run backfill_dedupe_keys() first.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        other = aliased(Market)
+        sim = db.func.similarity(Market.dedupe_key, other.dedupe_key)
+        rows = db.session.execute(
+            select(Market.market_id, other.market_id, sim, Market.dedupe_key, other.dedupe_key)
+            .join(other, and_(Market.market_id < other.market_id, Market.dedupe_key.op('%')(other.dedupe_key)))
+            .where(Market.is_active == db.true(), other.is_active == db.true(), sim >= threshold)
+            .order_by(sim.desc())
+        )
+        return [(a, b, round(s, 3)) for a, b, s, key_a, key_b in rows if _compatible(key_a, key_b)]
+
+    index = _local_index()
+    pairs = [
+        (a, b, round(s, 3))
+        for a, key in index.keys.items()
+        for b, s in index.query(key, threshold)
+        if a < b and _compatible(key, index.keys[b])
+    ]
+    pairs.sort(key=lambda p: -p[2])
+    return pairs
+
+
+class TrigramIndex:
+    """trigram -> market ids; candidates are ranked by exact similarity of their trigram sets."""
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.grams = {}
+        self.keys = {}
+
+    def add(self, market_id: int, key: str) -> None:
+        grams = trigrams(key)
+        self.keys[market_id], self.grams[market_id] = key, grams
+        for g in grams:
+            self.postings[g].add(market_id)
+
+    def query(self, key: str, threshold: float) -> list[tuple[int, float]]:
+        grams = trigrams(key)
+        if not grams:
+            return []
+        shared = Counter(m for g in grams for m in self.postings.get(g, ()))
+        hits = []
+        for market_id, n in shared.items():
+            # |A ∪ B| >= max(|A|, |B|): skip ids that can't reach the threshold before the exact check
+            if n / max(len(grams), len(self.grams[market_id])) < threshold:
+                continue
+            s = n / len(grams | self.grams[market_id])
+            if s >= threshold:
+                hits.append((market_id, s))
+        hits.sort(key=lambda h: (-h[1], h[0]))
+        return hits
+
+
+_index = None
+_stale = True
+_lock = threading.Lock()
+
+
+def _local_index() -> TrigramIndex:
+    global _index, _stale
+    with _lock:
+        if _stale or _index is None:
+            index = TrigramIndex()
+            for row in db.session.execute(
+                select(Market.market_id, Market.name, Market.address, Market.dedupe_key)
+                .where(Market.is_active == db.true())
+            ):
+                index.add(row.market_id, row.dedupe_key or dedupe_key(row.name, row.address))
+            _index, _stale = index, False
+        return _index
+
+
+def _mark_stale(*args):
+    global _stale
+    with _lock:
+        _stale = True
+
+
+for _name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Market, _name, _mark_stale)
+
+
+def _set_dedupe_key(mapper, connection, target):
+    """Key a market on flush, whatever code path creates or renames it."""
+    attrs = inspect(target).attrs
+    if target.dedupe_key is None or attrs.name.history.has_changes() or attrs.address.history.has_changes():
+        target.dedupe_key = dedupe_key(target.name, target.address)
+
+
+for _name in ('before_insert', 'before_update'):
+    event.listen(Market, _name, _set_dedupe_key)
@@ -0,0 +1,79 @@
+"""
+Bulk export of markets and reviews as NDJSON or CSV.
+
+Rows are read through a server-side cursor (`yield_per`) in primary-key
+order and written out one line at a time, so memory stays flat no
+matter how large the table is. Every row carries its id; a client that
+stops part-way resumes with `since_id=<last id it received>`.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from app.database import db
+from app.models.models import Market, Review
+
+# entity -> (primary key column, exported columns)
+EXPORTS = {
+    'markets': (
+        Market.market_id,
+        (Market.market_id, Market.name, Market.address, Market.type, Market.is_active),
+    ),
+    'reviews': (
+        Review.review_id,
+        (Review.review_id, Review.market_id, Review.user_id, Review.rating,
+         Review.comment, Review.timestamp, Review.sentiment_score),
+    ),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(entity: str, since_id: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield export rows with id > since_id, in id order, chunk_size rows per DB fetch."""
+    pk, columns = EXPORTS[entity]
+    stmt = (
+        select(*columns)
+        .where(pk > since_id)
+        .order_by(pk)
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in db.session.execute(stmt):
+        yield row
+
+
+def iter_export(entity: str, fmt: str, since_id: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield the export as text chunks (one line each) in the requested format."""
+    _, columns = EXPORTS[entity]
+    names = [c.key for c in columns]
+    rows = iter_rows(entity, since_id, chunk_size)
+
+    if fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps({name: _plain(v) for name, v in zip(names, row)}) + '\n'
+        return
+
+    # csv.writer needs a file; reuse one small buffer and drain it per row
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(names)
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate(0)
+    for row in rows:
+        writer.writerow([_plain(v) for v in row])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
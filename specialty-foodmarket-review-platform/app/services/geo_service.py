@@ -0,0 +1,65 @@
+"""
+"Markets near me" from Redis GEO sets.
+
+Coordinates are client-supplied on the market (latitude/longitude, no
+geocoder). Active markets with coordinates are kept in markets:geo and in a
+per-type set (markets:geo:type:butcher), so a type-filtered radius query
+never has to skip other types. GEOSEARCH walks the geohash cells covering
+the radius and returns members sorted by distance, stopping at the limit.
+"""
+from sqlalchemy import select
+from app.database import db
+from app.models.models import Market
+from app.utils.cache import redis_client, staged_swap
+from app.validators.validators import MARKET_TYPES
+
+GEO_KEY = "markets:geo"
+
+
+def geo_key(market_type=None):
+    return f"{GEO_KEY}:type:{market_type}" if market_type else GEO_KEY
+
+
+def index_location(market_id: int, market_type: str, latitude, longitude, client=None, keys=None) -> None:
+    """Add (or move) a market in the GEO sets; markets without coordinates are skipped."""
+    if latitude is None or longitude is None:
+        return
+    client = client or redis_client()
+    for key in keys or (geo_key(), geo_key(market_type)):
+        client.geoadd(key, (longitude, latitude, market_id))
+
+
+def unindex_location(market_id: int) -> None:
+    pipe = redis_client().pipeline()
+    for key in [geo_key()] + [geo_key(t) for t in MARKET_TYPES]:
+        pipe.zrem(key, market_id)  # GEO sets are ZSETs
+    pipe.execute()
+
+
+def nearby(latitude: float, longitude: float, radius_km: float, market_type=None, limit: int = 20):
+    """[(market_id, distance_km)] within radius_km, nearest first."""
+    results = redis_client().geosearch(
+        geo_key(market_type), longitude=longitude, latitude=latitude,
+        radius=radius_km, unit='km', sort='ASC', count=limit, withdist=True,
+    )
+    return [(int(member), distance) for member, distance in results]
+
+
+def rebuild_geo_index(chunk_size: int = 5000) -> int:
+    """Recreate every GEO set from active markets (temp keys + RENAME); returns markets indexed."""
+    client = redis_client()
+    count = 0
+    result = db.session.execute(
+        select(Market.market_id, Market.type, Market.latitude, Market.longitude)
+        .where(Market.is_active == db.true(), Market.latitude.isnot(None), Market.longitude.isnot(None))
+        .execution_options(yield_per=chunk_size)
+    )
+    with staged_swap([geo_key()] + [geo_key(t) for t in MARKET_TYPES], client) as tmp:
+        for rows in result.partitions():
+            pipe = client.pipeline(transaction=False)
+            for row in rows:
+                keys = (tmp(geo_key()), tmp(geo_key(row.type)))
+                index_location(row.market_id, row.type, row.latitude, row.longitude, client=pipe, keys=keys)
+            pipe.execute()
+            count += len(rows)
+    return count
@@ -0,0 +1,108 @@
+"""
+Bulk review ingest for partner migrations.
+
+A batch is validated up front (schema, markets, users) and either goes in
+whole or not at all. Sentiment is scored once per distinct text, rows go
+in with executemany INSERTs (multi-row VALUES batches on PostgreSQL), and
+the leaderboard gets one aggregated apply_stats_delta() per affected
+market instead of one per review.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+from app.database import db
+from app.models.models import Market, Review, User
+from app.services.sentiment_service import score_texts
+from app.utils.cache import invalidate_tags, redis_client
+from app.utils.leaderboard import TREND_BUCKET_TTL, apply_stats_delta, sentiment_bin, trend_key, trend_points
+from app.validators.validators import ReviewImportSchema
+
+INGEST_MAX_ROWS = 50000
+INGEST_CHUNK_SIZE = 5000  # rows per executemany INSERT; the batch commits once
+
+
+def validate_reviews(rows) -> list[dict]:
+    """Schema-validate a batch and check every market (active) and user exists.
+
+    Raises ValidationError with errors keyed by row index.
+    """
+    reviews = ReviewImportSchema(many=True).load(rows)
+    market_ids = {r['market_id'] for r in reviews}
+    user_ids = {r['user_id'] for r in reviews}
+    active = set(db.session.scalars(
+        select(Market.market_id).where(Market.market_id.in_(market_ids), Market.is_active == db.true())
+    ))
+    users = set(db.session.scalars(select(User.user_id).where(User.user_id.in_(user_ids))))
+    errors = {}
+    for i, r in enumerate(reviews):
+        if r['market_id'] not in active:
+            errors.setdefault(i, {})['market_id'] = ['Unknown or inactive market.']
+        if r['user_id'] not in users:
+            errors.setdefault(i, {})['user_id'] = ['Unknown user.']
+    if errors:
+        raise ValidationError(errors)
+    return reviews
+
+
+def _stats_deltas(reviews):
+    """Fold a batch into one stats delta per market plus trend points per (day, market)."""
+    deltas = {}
+    trend = defaultdict(float)
+    oldest_day = datetime.now(timezone.utc).date() - timedelta(days=TREND_BUCKET_TTL // 86400)
+    for r in reviews:
+        d = deltas.setdefault(r['market_id'], {'rating': 0, 'sent': 0.0, 'count': 0, 'hist': defaultdict(int)})
+        d['rating'] += r['rating']
+        d['sent'] += r['sentiment_score']
+        d['count'] += 1
+        d['hist'][f"hist:{sentiment_bin(r['sentiment_score'])}"] += 1
+        day = r['timestamp'].date() if r['timestamp'] else None
+        if day is None or day >= oldest_day:  # older buckets have already expired
+            trend[(day, r['market_id'])] += trend_points(r['rating'], r['sentiment_score'])
+    return deltas, trend
+
+
+def ingest_reviews(rows, chunk_size=INGEST_CHUNK_SIZE) -> dict:
+    """Validate, score and insert a batch of reviews; returns {'inserted', 'markets'}.
+
+    Raises ValidationError (nothing is inserted) if any row is invalid.
+    """
+    reviews = validate_reviews(rows)
+    if not reviews:
+        return {'inserted': 0, 'markets': 0}
+
+    texts = list({r['review'] for r in reviews})  # partner data repeats a lot of short texts
+    scores = dict(zip(texts, score_texts(texts)))
+    for r in reviews:
+        r['sentiment_score'] = scores[r['review']]
+
+    for start in range(0, len(reviews), chunk_size):
+        db.session.execute(insert(Review), [
+            {
+                'market_id': r['market_id'],
+                'user_id': r['user_id'],
+                'rating': r['rating'],
+                'comment': r['review'],
+                'sentiment_score': r['sentiment_score'],
+                # without a timestamp the column default (CURRENT_TIMESTAMP) applies
+                **({'timestamp': r['timestamp']} if r['timestamp'] else {}),
+            }
+            for r in reviews[start:start + chunk_size]
+        ])
+    db.session.commit()
+
+    market_types = dict(db.session.execute(
+        select(Market.market_id, Market.type).where(Market.market_id.in_({r['market_id'] for r in reviews}))
+    ).all())
+    deltas, trend = _stats_deltas(reviews)
+    for market_id, d in deltas.items():
+        apply_stats_delta(market_id, d['rating'], d['sent'], d['count'], dict(d['hist']), market_types[market_id])
+    if trend:
+        pipe = redis_client().pipeline(transaction=False)
+        for (day, market_id), points in trend.items():
+            pipe.zincrby(trend_key(day), round(points, 4), market_id)
+        for day in {day for day, _ in trend}:
+            pipe.expire(trend_key(day), TREND_BUCKET_TTL)
+        pipe.execute()
+    invalidate_tags(*[f'reviews:market:{market_id}' for market_id in deltas])
+    return {'inserted': len(reviews), 'markets': len(deltas)}
@@ -0,0 +1,85 @@
+"""
+Read-side helpers for market list and summary endpoints.
+
+List endpoints select only the columns they emit, so rows come back as
+lightweight tuples instead of full ORM objects: no identity-map
+bookkeeping, no MarketAccount join, and one small dict per row. Nothing
+here reads the account; a query that needs it should ask for it with a
+loader option (`joinedload(Market.account)`) instead of every query
+paying for it.
+
+Summaries are also kept in Redis (market:{id}:details) so pages of ids from
+the leaderboard ZSETs can be hydrated with one pipelined HMGET.
+"""
+from sqlalchemy import select
+from app.database import db
+from app.models.models import Market
+from app.utils.cache import redis_client
+from app.utils.pagination import fetch_page
+
+# Columns behind every market summary we send to clients
+MARKET_SUMMARY_COLUMNS = (Market.market_id, Market.name, Market.address, Market.type)
+
+
+def market_summary(row) -> dict:
+    """Serialize a summary row (or a Market instance - same attribute names)."""
+    return {
+        'id': row.market_id,
+        'name': row.name,
+        'address': row.address,
+        'type': row.type,
+    }
+
+
+def list_market_summaries(limit: int, cursor: int | None = None, market_type: str | None = None):
+    """One keyset page of active markets as summary dicts, plus the next cursor (or None)."""
+    stmt = select(*MARKET_SUMMARY_COLUMNS).where(Market.is_active == db.true())
+    if market_type:
+        stmt = stmt.where(Market.type == market_type)
+    if cursor is not None:
+        stmt = stmt.where(Market.market_id > cursor)
+    rows, next_cursor = fetch_page(stmt.order_by(Market.market_id), limit, lambda row: row.market_id)
+    return [market_summary(row) for row in rows], next_cursor
+
+
+_DETAIL_FIELDS = ('name', 'type', 'address')
+
+
+def details_key(market_id) -> str:
+    return f"market:{market_id}:details"
+
+
+def cache_market_summaries(summaries) -> None:
+    """Write summaries into their market:{id}:details hashes."""
+    pipe = redis_client().pipeline(transaction=False)
+    for summary in summaries:
+        pipe.hset(details_key(summary['id']), mapping={f: summary[f] for f in _DETAIL_FIELDS})
+    pipe.execute()
+
+
+def hydrate_markets(market_ids) -> dict:
+    """Summaries for market_ids, keyed by id: one pipelined HMGET, then one SQL
+    query (which also back-fills Redis) for any id not cached yet. Soft-deleted
+    markets are left out; their cached details are dropped on delete."""
+    market_ids = [int(i) for i in market_ids]
+    if not market_ids:
+        return {}
+    pipe = redis_client().pipeline(transaction=False)
+    for market_id in market_ids:
+        pipe.hmget(details_key(market_id), _DETAIL_FIELDS)
+
+    found, missing = {}, []
+    for market_id, values in zip(market_ids, pipe.execute()):
+        if values[0] is None:
+            missing.append(market_id)
+        else:
+            found[market_id] = {'id': market_id, **{f: v.decode() for f, v in zip(_DETAIL_FIELDS, values)}}
+
+    if missing:
+        rows = db.session.execute(
+            select(*MARKET_SUMMARY_COLUMNS).where(Market.market_id.in_(missing), Market.is_active == db.true())
+        ).all()
+        summaries = [market_summary(row) for row in rows]
+        cache_market_summaries(summaries)
+        found.update((summary['id'], summary) for summary in summaries)
+    return found
@@ -0,0 +1,214 @@
+"""
+Near-duplicate review detection with MinHash + LSH.
+
+A review's text is cut into character 5-gram shingles and summarized by a
+MinHash signature of NUM_PERM 32-bit values; the share of equal positions
+between two signatures estimates the Jaccard similarity of their shingle
+sets. The signature is split into LSH_BANDS bands of LSH_ROWS values, and
+each band is hashed to a Redis bucket (a SET of review ids):
+
+    reviews:lsh:<band>:<band hash>
+
+Two reviews with Jaccard similarity s share at least one bucket with
+probability 1 - (1 - s^LSH_ROWS)^LSH_BANDS (about 0.98 at s = 0.8, 0.03 at
+s = 0.3), so a new review only compares against the few reviews in its own
+buckets, no matter how many exist. Candidates are confirmed on their
+stored signatures (reviews:minhash, review id -> packed signature).
+
+Short reviews ("Great food, great service!") are written independently by
+many people, so below MIN_SHINGLES shingles only the author's own reviews
+count as copies. Flagged reviews point at the review they copy through
+Review.duplicate_of and are left out of the market stats and leaderboards.
+"""
+import hashlib
+import re
+import zlib
+import numpy as np
+from sqlalchemy import select, update
+from app.database import db
+from app.models.models import Review
+from app.utils.cache import redis_client
+
+NUM_PERM = 64
+LSH_BANDS, LSH_ROWS = 16, 4  # NUM_PERM = LSH_BANDS * LSH_ROWS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.8   # estimated Jaccard similarity flagged as a duplicate
+MIN_SHINGLES = 40           # shorter reviews only match the same author's (about 44 characters)
+BUCKET_SAMPLE = 20          # ids compared per bucket; keeps a spam wave's huge buckets O(1)
+
+SIGNATURES_KEY = "reviews:minhash"
+BUCKET_PREFIX = "reviews:lsh"
+
+_PRIME = (1 << 31) - 1  # Mersenne prime; a * x stays below 2**62, no uint64 overflow
+_rng = np.random.RandomState(20240601)  # fixed seed: signatures must be stable across processes
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+_WS_RE = re.compile(r"\s+")
+
+
+def shingles(text: str) -> set[str]:
+    text = _WS_RE.sub(' ', (text or '').lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def is_short(text: str) -> bool:
+    return len(shingles(text)) < MIN_SHINGLES
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32) of the text's shingles."""
+    hashes = np.fromiter((zlib.crc32(s.encode()) % _PRIME for s in shingles(text)), dtype=np.uint64)
+    if not hashes.size:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint32)
+    # one row per permutation: (a * x + b) mod p over every shingle hash, then the minimum
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+def bucket_keys(sig: np.ndarray) -> list[str]:
+    bands = sig.reshape(LSH_BANDS, LSH_ROWS)
+    return [
+        f"{BUCKET_PREFIX}:{i}:{hashlib.blake2b(band.tobytes(), digest_size=8).hexdigest()}"
+        for i, band in enumerate(bands)
+    ]
+
+
+def find_duplicate(sig: np.ndarray, exclude=None, author=None) -> int | None:
+    """Id of the most similar indexed review at or above DUPLICATE_THRESHOLD, or None.
+
+    With author (a user id), only that user's reviews are candidates; pass it for
+    is_short() texts.
+    """
+    client = redis_client()
+    pipe = client.pipeline(transaction=False)
+    for key in bucket_keys(sig):
+        pipe.srandmember(key, BUCKET_SAMPLE)
+    candidates = {int(m) for members in pipe.execute() for m in members} - {exclude}
+    if candidates and author is not None:
+        candidates = set(db.session.scalars(
+            select(Review.review_id).where(Review.review_id.in_(candidates), Review.user_id == author)
+        ))
+    if not candidates:
+        return None
+    candidates = sorted(candidates)
+    sims = {
+        review_id: similarity(sig, np.frombuffer(packed, dtype=np.uint32))
+        for review_id, packed in zip(candidates, client.hmget(SIGNATURES_KEY, candidates))
+        if packed is not None
+    }
+    return _best_match(sims)
+
+
+def _best_match(sims: dict) -> int | None:
+    """Most similar id at or above the threshold; the earliest review wins ties."""
+    best = max(sims.items(), key=lambda item: (item[1], -item[0]), default=None)
+    return best[0] if best and best[1] >= DUPLICATE_THRESHOLD else None
+
+
+def index_review(review_id: int, sig: np.ndarray, client=None) -> None:
+    """Add a review to its LSH buckets and store its signature (pass a pipeline to batch)."""
+    pipe = client or redis_client().pipeline(transaction=False)
+    pipe.hset(SIGNATURES_KEY, review_id, sig.tobytes())
+    for key in bucket_keys(sig):
+        pipe.sadd(key, review_id)
+    if client is None:
+        pipe.execute()
+
+
+def unindex_review(review_id: int) -> None:
+    client = redis_client()
+    packed = client.hget(SIGNATURES_KEY, review_id)
+    if packed is None:
+        return
+    pipe = client.pipeline(transaction=False)
+    for key in bucket_keys(np.frombuffer(packed, dtype=np.uint32)):
+        pipe.srem(key, review_id)
+    pipe.hdel(SIGNATURES_KEY, review_id)
+    pipe.execute()
+
+
+def reset_index() -> None:
+    """Drop every bucket and signature and clear all duplicate flags."""
+    client = redis_client()
+    keys = list(client.scan_iter(f"{BUCKET_PREFIX}:*", count=1000))
+    for start in range(0, len(keys), 1000):
+        client.delete(*keys[start:start + 1000])
+    client.delete(SIGNATURES_KEY)
+    db.session.execute(update(Review).where(Review.duplicate_of.isnot(None)).values(duplicate_of=None))
+    db.session.commit()
+
+
+def build_index(chunk_size: int = 2000, start_after: int = 0):
+    """Index existing reviews in review_id order, flagging each one that copies an earlier review.
+
+    Per chunk: one pipeline of bucket samples, one HMGET of candidate signatures,
+    one pipeline of writes and one executemany UPDATE of the flags. Reviews of the
+    same chunk are matched against each other in memory, and one query reads the
+    authors of the candidates for is_short() reviews. Generator: yields
+    {'reviews', 'flagged', 'last_id'} after each chunk so callers can report progress.
+    """
+    client = redis_client()
+    last_id, total, flagged = start_after, 0, 0
+    while True:
+        rows = db.session.execute(
+            select(Review.review_id, Review.user_id, Review.comment)
+            .where(Review.review_id > last_id)
+            .order_by(Review.review_id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        sigs = {r.review_id: signature(r.comment) for r in rows}
+        short = {r.review_id for r in rows if is_short(r.comment)}
+        authors = {r.review_id: r.user_id for r in rows}
+        keys = {review_id: bucket_keys(sig) for review_id, sig in sigs.items()}
+
+        unique_keys = list({k for ks in keys.values() for k in ks})
+        pipe = client.pipeline(transaction=False)
+        for key in unique_keys:
+            pipe.srandmember(key, BUCKET_SAMPLE)
+        remote = {key: [int(m) for m in members] for key, members in zip(unique_keys, pipe.execute())}
+        remote_ids = sorted({m for members in remote.values() for m in members})
+        known = {
+            review_id: np.frombuffer(packed, dtype=np.uint32)
+            for review_id, packed in zip(remote_ids, client.hmget(SIGNATURES_KEY, remote_ids) if remote_ids else [])
+            if packed is not None
+        }
+        if short and known:
+            authors.update(db.session.execute(
+                select(Review.review_id, Review.user_id).where(Review.review_id.in_(list(known)))
+            ).all())
+
+        local = {}  # bucket key -> ids of this chunk already placed in it
+        flags = []
+        for review_id, sig in sigs.items():
+            candidates = {
+                c for key in keys[review_id]
+                for c in remote[key] + local.get(key, [])[-BUCKET_SAMPLE:]
+            } - {review_id}
+            if review_id in short:
+                candidates = {c for c in candidates if authors.get(c) == authors[review_id]}
+            others = {c: sigs[c] if c in sigs else known.get(c) for c in candidates}
+            best = _best_match({c: similarity(sig, other) for c, other in others.items() if other is not None})
+            if best is not None:
+                flags.append({'review_id': review_id, 'duplicate_of': best})
+            for key in keys[review_id]:
+                local.setdefault(key, []).append(review_id)
+
+        pipe = client.pipeline(transaction=False)
+        for review_id, sig in sigs.items():
+            index_review(review_id, sig, client=pipe)
+        pipe.execute()
+        if flags:
+            db.session.execute(update(Review), flags)
+        db.session.commit()
+
+        last_id = rows[-1].review_id
+        total += len(rows)
+        flagged += len(flags)
+        yield {'reviews': total, 'flagged': flagged, 'last_id': last_id}
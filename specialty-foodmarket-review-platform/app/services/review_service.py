@@ -0,0 +1,63 @@
+"""
+Read-side helpers for review listings.
+
+Listings are keyset-paginated on (timestamp DESC, review_id): the cursor
+is the position of the last review sent, so page N costs the same index
+range scan as page 1 instead of an OFFSET that reads and discards every
+earlier row. ix_reviews_market_ts_id / ix_reviews_user_ts_id match the
+ORDER BY exactly.
+"""
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from app.models.models import Review
+from app.utils.pagination import fetch_page
+
+REVIEW_COLUMNS = (
+    Review.review_id, Review.market_id, Review.user_id, Review.rating,
+    Review.comment, Review.sentiment_score, Review.timestamp,
+)
+
+
+def review_summary(row) -> dict:
+    return {
+        'id': row.review_id,
+        'market_id': row.market_id,
+        'user_id': row.user_id,
+        'rating': row.rating,
+        'review': row.comment,
+        'sentiment_score': row.sentiment_score,  # None while scoring is pending
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+    }
+
+
+def encode_cursor(row) -> str:
+    raw = f"{row.timestamp.isoformat()}|{row.review_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """(timestamp, review_id) of an encode_cursor() string; ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, review_id = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(review_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def list_reviews(limit: int, cursor: str | None = None, market_id: int | None = None, user_id: int | None = None):
+    """One keyset page of a market's (or a user's) reviews, newest first, plus the next cursor (or None)."""
+    stmt = select(*REVIEW_COLUMNS)
+    if market_id is not None:
+        stmt = stmt.where(Review.market_id == market_id)
+    if user_id is not None:
+        stmt = stmt.where(Review.user_id == user_id)
+    if cursor:
+        timestamp, review_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Review.timestamp < timestamp,
+            and_(Review.timestamp == timestamp, Review.review_id > review_id),
+        ))
+    rows, next_cursor = fetch_page(stmt.order_by(Review.timestamp.desc(), Review.review_id), limit, encode_cursor)
+    return [review_summary(row) for row in rows], next_cursor
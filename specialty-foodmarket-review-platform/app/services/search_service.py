@@ -0,0 +1,187 @@
+"""
+Ranked full-text search over markets (name, address) and review comments.
+
+On PostgreSQL, matching and ranking happen in the database: the generated
+`search_vector` tsvector columns (migration 9d4f6a1c3e8b) carry GIN
+indexes, so `search_vector @@ websearch_to_tsquery(...)` is an index
+lookup and only the matches are ranked with ts_rank_cd. The columns are
+not mapped on the models (SQLite can't create them) and are referenced
+with literal_column instead.
+
+Anywhere else (SQLite dev/test runs) an in-process inverted index serves
+the same API. It is built on first use and rebuilt after writes to the
+table it covers; matching is a plain AND of lowercased terms, without the
+stemming of the english text search config.
+
+Results are ordered by (rank DESC, id) and keyset-paginated on that pair.
+"""
+import base64
+import math
+import re
+import threading
+from collections import defaultdict
+from sqlalchemy import and_, event, or_, select
+from sqlalchemy.orm import Session
+from app.database import db
+from app.models.models import Market, Review
+from app.services.market_service import MARKET_SUMMARY_COLUMNS, market_summary
+from app.services.review_service import REVIEW_COLUMNS, review_summary
+from app.utils.pagination import page_rows
+
+# scope -> what to search and how to serialize it
+SEARCH_SCOPES = {
+    'markets': {
+        'model': Market,
+        'pk': Market.market_id,
+        'columns': MARKET_SUMMARY_COLUMNS,
+        'serialize': market_summary,
+        'where': lambda stmt: stmt.where(Market.is_active == db.true()),
+        # (attribute, weight) - mirrors setweight A/B in the migration
+        'fields': ((Market.name, 1.0), (Market.address, 0.4)),
+    },
+    'reviews': {
+        'model': Review,
+        'pk': Review.review_id,
+        'columns': REVIEW_COLUMNS,
+        'serialize': review_summary,
+        'where': lambda stmt: stmt.join(Market, Market.market_id == Review.market_id).where(Market.is_active == db.true()),
+        'fields': ((Review.comment, 1.0),),
+    },
+}
+
+
+def encode_cursor(rank: float, item_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}|{item_id}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """(rank, id) of an encode_cursor() string; ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        rank, item_id = raw.split('|')
+        return float(rank), int(item_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def search(q: str, scope: str = 'markets', limit: int = 20, cursor: str | None = None):
+    """One ranked page of matches for q, plus the next cursor (or None).
+
+    Each result is the scope's usual summary dict with its 'rank' added.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    if db.engine.dialect.name == 'postgresql':
+        ranked = _pg_search(SEARCH_SCOPES[scope], q, limit + 1, after)
+    else:
+        ranked = _local_search(scope, q, limit + 1, after)
+    page, next_cursor = page_rows(ranked, limit, lambda hit: encode_cursor(hit[1], hit[0]['id']))
+    return [{**item, 'rank': rank} for item, rank in page], next_cursor
+
+
+def _pg_search(spec, q, limit, after):
+    vector = db.literal_column(f"{spec['model'].__tablename__}.search_vector")
+    query = db.func.websearch_to_tsquery('english', q)
+    rank = db.func.ts_rank_cd(vector, query)
+    stmt = spec['where'](select(*spec['columns'], rank.label('rank')).where(vector.op('@@')(query)))
+    if after:
+        # ts_rank_cd returns real; compare as real so the cursor's rank matches exactly
+        last_rank = db.cast(after[0], db.REAL)
+        stmt = stmt.where(or_(rank < last_rank, and_(rank == last_rank, spec['pk'] > after[1])))
+    stmt = stmt.order_by(rank.desc(), spec['pk']).limit(limit)
+    return [(spec['serialize'](row), row.rank) for row in db.session.execute(stmt)]
+
+
+# ---- in-process fallback --------------------------------------------------
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = frozenset('a an and are as at be by for from in is it of on or that the this to was with'.split())
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if t not in _STOP_WORDS]
+
+
+class InvertedIndex:
+    """term -> {doc id: weighted term frequency}, scored with tf-idf at query time."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.size = 0
+
+    def add(self, doc_id: int, fields) -> None:
+        """fields: iterable of (text, weight)."""
+        self.size += 1
+        for text, weight in fields:
+            for term in tokenize(text):
+                posting = self.postings[term]
+                posting[doc_id] = posting.get(doc_id, 0.0) + weight
+
+    def search(self, q: str) -> list[tuple[float, int]]:
+        """(score, doc id) of documents containing every query term, best first then by id."""
+        terms = set(tokenize(q))
+        postings = [self.postings.get(t, {}) for t in terms]
+        if not postings or not all(postings):
+            return []
+        postings.sort(key=len)  # intersect starting from the rarest term
+        docs = set(postings[0]).intersection(*postings[1:])
+        idf = [math.log(1 + self.size / len(p)) for p in postings]
+        scored = [
+            (round(sum(p[d] * w for p, w in zip(postings, idf)), 6), d)
+            for d in docs
+        ]
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return scored
+
+
+_local_indexes = {}    # scope -> InvertedIndex
+_stale = set(SEARCH_SCOPES)
+_local_lock = threading.Lock()
+
+
+def _local_index(scope):
+    with _local_lock:
+        if scope in _stale or scope not in _local_indexes:
+            spec = SEARCH_SCOPES[scope]
+            index = InvertedIndex()
+            attrs = [attr for attr, _ in spec['fields']]
+            for row in db.session.execute(spec['where'](select(spec['pk'], *attrs))):
+                index.add(row[0], zip(row[1:], (w for _, w in spec['fields'])))
+            _local_indexes[scope] = index
+            _stale.discard(scope)
+        return _local_indexes[scope]
+
+
+def _local_search(scope, q, limit, after):
+    spec = SEARCH_SCOPES[scope]
+    hits = _local_index(scope).search(q)
+    if after:
+        hits = [(s, d) for s, d in hits if s < after[0] or (s == after[0] and d > after[1])]
+    hits = hits[:limit]
+    if not hits:
+        return []
+    rows = {row[0]: row for row in db.session.execute(
+        select(*spec['columns']).where(spec['pk'].in_([d for _, d in hits]))
+    )}
+    return [(spec['serialize'](rows[d]), s) for s, d in hits if d in rows]
+
+
+def _mark_stale(*scopes):
+    with _local_lock:
+        _stale.update(scopes)
+
+
+_SCOPE_BY_MODEL = {spec['model']: scope for scope, spec in SEARCH_SCOPES.items()}
+
+for _model, _scope in _SCOPE_BY_MODEL.items():
+    for _name in ('after_insert', 'after_update', 'after_delete'):
+        # market activity changes which reviews are searchable too
+        event.listen(_model, _name, lambda *a, _s=_scope: _mark_stale(_s, 'reviews'))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_stale_on_bulk(state):
+    """insert(Review) / update(Review) statements bypass the mapper events above."""
+    if state.is_insert or state.is_update or state.is_delete:
+        for mapper in state.all_mappers:
+            if mapper.class_ in _SCOPE_BY_MODEL:
+                _mark_stale(_SCOPE_BY_MODEL[mapper.class_], 'reviews')
@@ -0,0 +1,117 @@
+"""
+VADER sentiment scoring shared by the request path, Celery tasks and CLI jobs.
+
+The analyzer loads its lexicon once at import; build it once per process
+and reuse it.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select, update
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from app.database import db
+from app.models.models import Review
+
+analyzer = SentimentIntensityAnalyzer()
+
+RESCORE_CHECKPOINT_KEY = "reviews:rescore:checkpoint"
+RESCORE_MEMO_SIZE = 200_000  # distinct text hashes remembered across chunks (LRU)
+
+
+def score_text(text: str) -> float:
+    """VADER compound score in [-1, 1]."""
+    return analyzer.polarity_scores(text or '')['compound']
+
+
+def score_texts(texts) -> list[float]:
+    return [score_text(t) for t in texts]
+
+
+def load_lexicon(path: str) -> dict:
+    """Read custom lexicon entries, one `token<TAB>valence` per line (VADER's own format)."""
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            token, valence = line.rstrip('\n').split('\t')[:2]
+            entries[token] = float(valence)
+    return entries
+
+
+def _init_worker(lexicon_updates):
+    # Runs once in each pool process: the module-level analyzer is already loaded
+    # (inherited on fork, imported on spawn); only the custom entries need applying.
+    if lexicon_updates:
+        analyzer.lexicon.update(lexicon_updates)
+
+
+def _text_key(text) -> bytes:
+    return hashlib.blake2b((text or '').encode('utf-8'), digest_size=16).digest()
+
+
+def rescore_reviews(chunk_size: int = 2000, workers: int | None = None, start_after: int = 0,
+                    lexicon_updates: dict | None = None, only_missing: bool = False, checkpoint=None,
+                    memo_size: int = RESCORE_MEMO_SIZE):
+    """Recompute Review.sentiment_score for every review with review_id > start_after.
+
+    Reviews are streamed in keyset chunks. Each chunk's distinct texts are
+    scored once (a content-hash memo of the last memo_size texts, least
+    recently used evicted first, also skips texts seen in earlier chunks),
+    fanned out over a process pool, written back with one executemany
+    UPDATE and committed. `checkpoint(last_id)` is called after every commit
+    so an interrupted run can resume. Yields a progress dict per chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    memo = OrderedDict()
+    last_id = start_after
+    done = unique = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(lexicon_updates,)) as pool:
+        while True:
+            stmt = select(Review.review_id, Review.comment).where(Review.review_id > last_id)
+            if only_missing:
+                stmt = stmt.where(Review.sentiment_score.is_(None))
+            rows = db.session.execute(stmt.order_by(Review.review_id).limit(chunk_size)).all()
+            if not rows:
+                return
+
+            keys = [_text_key(r.comment) for r in rows]
+            chunk_scores, pending = {}, {}
+            for key, row in zip(keys, rows):
+                if key in memo:
+                    memo.move_to_end(key)
+                    chunk_scores[key] = memo[key]
+                else:
+                    pending.setdefault(key, row.comment)
+            if pending:
+                texts = list(pending.values())
+                step = -(-len(texts) // workers)  # ceil: one slice per worker
+                slices = [texts[i:i + step] for i in range(0, len(texts), step)]
+                scores = [s for part in pool.map(score_texts, slices) for s in part]
+                chunk_scores.update(zip(pending.keys(), scores))
+                memo.update(zip(pending.keys(), scores))
+                while len(memo) > memo_size:
+                    memo.popitem(last=False)
+                unique += len(pending)
+
+            db.session.execute(
+                update(Review),
+                [{"review_id": r.review_id, "sentiment_score": chunk_scores[k]} for r, k in zip(rows, keys)],
+            )
+            db.session.commit()
+            last_id = rows[-1].review_id
+            done += len(rows)
+            if checkpoint:
+                checkpoint(last_id)
+
+            elapsed = time.perf_counter() - started
+            yield {
+                "last_id": last_id,
+                "reviews": done,
+                "unique_texts": unique,
+                "per_second": done / elapsed if elapsed else 0.0,
+            }
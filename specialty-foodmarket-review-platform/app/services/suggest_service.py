@@ -0,0 +1,168 @@
+"""
+Typeahead suggestions for market names from per-prefix Redis ZSETs.
+
+Every active market is a member of markets:suggest:p:<prefix> for each
+prefix (up to SUGGEST_PREFIX_MAX characters) of each word-suffix of its
+normalized name, scored with its leaderboard score:
+
+    "Harbor Fish Deli" -> p:h, p:ha, ... p:harbor f, p:f, p:fi, ... p:fish del, p:d, ...
+
+A prefix lookup is then one ZREVRANGE on p:<prefix>: the most popular
+matches come first however many markets share the prefix, and the start
+of any word matches ("fish" finds "Harbor Fish Deli"). Unranked markets
+carry -inf and follow the ranked ones. Display names live in the
+markets:suggest:names hash. Longer prefixes read the capped set in score
+order and filter on the full prefix.
+
+Scores are kept current by apply_stats_delta() and the leaderboard
+rebuild/reconcile jobs (rescore_market / refresh_suggest_scores); the
+index is maintained on market create and soft-delete, and
+rebuild_suggest_index() resyncs it from the table.
+"""
+import unicodedata
+from sqlalchemy import select
+from app.database import db
+from app.models.models import Market
+from app.utils.cache import redis_client
+from app.utils.leaderboard import board_key
+
+SUGGEST_NAMES_KEY = "markets:suggest:names"  # market_id -> display name
+SUGGEST_PREFIX_MAX = 8  # longest indexed prefix; longer ones are filtered from it
+SUGGEST_SCAN_PAGE = 100  # members read per round when filtering a longer prefix
+UNRANKED = float('-inf')
+
+
+def prefix_key(prefix: str) -> str:
+    return f"markets:suggest:p:{prefix}"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents stripped, whitespace collapsed - the form prefixes are matched in."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def _word_suffixes(name: str) -> list[str]:
+    words = normalize(name).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def _prefixes(name: str) -> set[str]:
+    return {s[:n] for s in _word_suffixes(name) for n in range(1, min(len(s), SUGGEST_PREFIX_MAX) + 1)}
+
+
+def _score(score):
+    return UNRANKED if score is None else float(score)
+
+
+def index_market(market_id: int, name: str, score=None, pipe=None) -> None:
+    """Add a market to the index; score defaults to its current leaderboard score."""
+    client = redis_client()
+    if score is None:
+        score = client.zscore(board_key(), market_id)
+    own = pipe is None
+    if own:
+        pipe = client.pipeline(transaction=False)
+    pipe.hset(SUGGEST_NAMES_KEY, market_id, name)
+    for prefix in _prefixes(name):
+        pipe.zadd(prefix_key(prefix), {market_id: _score(score)})
+    if own:
+        pipe.execute()
+
+
+def unindex_market(market_id: int, name: str) -> None:
+    pipe = redis_client().pipeline(transaction=False)
+    pipe.hdel(SUGGEST_NAMES_KEY, market_id)
+    for prefix in _prefixes(name):
+        pipe.zrem(prefix_key(prefix), market_id)
+    pipe.execute()
+
+
+def rescore_market(market_id: int, score) -> None:
+    """Move an indexed market to its new leaderboard score (None: no longer ranked)."""
+    client = redis_client()
+    name = client.hget(SUGGEST_NAMES_KEY, market_id)
+    if name is None:
+        return  # not indexed (inactive, or the index hasn't been built)
+    pipe = client.pipeline(transaction=False)
+    for prefix in _prefixes(name.decode()):
+        pipe.zadd(prefix_key(prefix), {market_id: _score(score)}, xx=True)
+    pipe.execute()
+
+
+def suggest(prefix: str, limit: int = 10) -> list[dict]:
+    """Up to `limit` markets with a name word starting with prefix, best-ranked first."""
+    prefix = normalize(prefix)
+    if not prefix:
+        return []
+    client = redis_client()
+    key = prefix_key(prefix[:SUGGEST_PREFIX_MAX])
+    exact = len(prefix) <= SUGGEST_PREFIX_MAX
+    page = limit if exact else SUGGEST_SCAN_PAGE
+    found, start = [], 0
+    while len(found) < limit:
+        members = client.zrevrange(key, start, start + page - 1, withscores=True)
+        if not members:
+            break
+        names = client.hmget(SUGGEST_NAMES_KEY, [m for m, _ in members])
+        for (market_id, score), name in zip(members, names):
+            if name is None:
+                continue
+            name = name.decode()
+            if exact or any(s.startswith(prefix) for s in _word_suffixes(name)):
+                found.append({'id': int(market_id), 'name': name, 'score': None if score == UNRANKED else score})
+        if len(members) < page:
+            break
+        start += page
+    # unranked markets tie at -inf; show those alphabetically
+    return sorted(found[:limit], key=lambda s: (s['score'] is None, -(s['score'] or 0), s['name'].lower()))
+
+
+def refresh_suggest_scores(chunk_size: int = 1000) -> int:
+    """Re-read every indexed market's leaderboard score, e.g. after a leaderboard rebuild."""
+    client = redis_client()
+    count = 0
+    cursor = 0
+    while True:
+        cursor, names = client.hscan(SUGGEST_NAMES_KEY, cursor, count=chunk_size)
+        if names:
+            ids = list(names)
+            scores = client.zmscore(board_key(), ids)
+            pipe = client.pipeline(transaction=False)
+            for market_id, score in zip(ids, scores):
+                for prefix in _prefixes(names[market_id].decode()):
+                    pipe.zadd(prefix_key(prefix), {market_id: _score(score)}, xx=True)
+            pipe.execute()
+            count += len(ids)
+        if cursor == 0:
+            return count
+
+
+def rebuild_suggest_index(chunk_size: int = 5000) -> int:
+    """Resync the index with the active markets in place; returns markets indexed.
+
+    Prefix sets are upserted rather than swapped (a market spans dozens of keys), then
+    markets that are no longer active, or were renamed, are dropped from their old prefixes.
+    """
+    client = redis_client()
+    indexed = {int(k): v.decode() for k, v in client.hgetall(SUGGEST_NAMES_KEY).items()}
+    active = set()
+    result = db.session.execute(
+        select(Market.market_id, Market.name).where(Market.is_active == db.true())
+        .execution_options(yield_per=chunk_size)
+    )
+    for rows in result.partitions():
+        scores = client.zmscore(board_key(), [row.market_id for row in rows])
+        pipe = client.pipeline(transaction=False)
+        for row, score in zip(rows, scores):
+            old_name = indexed.get(row.market_id)
+            if old_name is not None and old_name != row.name:
+                for prefix in _prefixes(old_name) - _prefixes(row.name):
+                    pipe.zrem(prefix_key(prefix), row.market_id)
+            index_market(row.market_id, row.name, score=_score(score), pipe=pipe)
+            active.add(row.market_id)
+        pipe.execute()
+    for market_id in indexed.keys() - active:
+        unindex_market(market_id, indexed[market_id])
+    return len(active)
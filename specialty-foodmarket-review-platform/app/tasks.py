@@ -0,0 +1,102 @@
+"""
+Celery tasks.
+
+Sentiment scoring runs off the review write path: post_review stores the
+review with a pending (NULL) score and calls enqueue_sentiment(). Pending
+ids collect in a Redis list and one debounced task drains it in batches,
+so a burst of reviews costs one task and a handful of bulk UPDATEs
+instead of one VADER call and commit per request.
+"""
+from celery import shared_task
+from sqlalchemy import case, select, update
+from app.database import db
+from app.models.models import Market, Review
+from app.services.sentiment_service import score_texts
+from app.utils.cache import invalidate_tags, redis_client
+from app.utils.leaderboard import publish_variants, reconcile_leaderboard, update_leaderboard
+
+SENTIMENT_PENDING_KEY = "sentiment:pending"     # list of review ids awaiting a score
+SENTIMENT_SCHEDULED_KEY = "sentiment:scheduled"  # set while a drain task is queued
+SENTIMENT_BATCH_SIZE = 500
+SENTIMENT_DEBOUNCE_SECONDS = 2
+
+
+def enqueue_sentiment(*review_ids):
+    """Queue reviews for scoring; schedules a drain task unless one is already queued."""
+    pipe = redis_client().pipeline()  # MULTI: the push and the schedule check are atomic
+    pipe.rpush(SENTIMENT_PENDING_KEY, *review_ids)
+    pipe.set(SENTIMENT_SCHEDULED_KEY, 1, nx=True, ex=60)
+    _, should_schedule = pipe.execute()
+    if should_schedule:
+        # the short countdown lets a burst of reviews pile into one batch
+        score_pending_reviews.apply_async(countdown=SENTIMENT_DEBOUNCE_SECONDS)
+
+
+@shared_task(name="sentiment.score_pending_reviews")
+def score_pending_reviews(batch_size: int = SENTIMENT_BATCH_SIZE):
+    """Drain the pending list, scoring up to batch_size reviews per round. Returns how many were scored."""
+    client = redis_client()
+    # Clear the flag before popping: anything pushed from now on schedules a new task,
+    # anything pushed before is drained by this one.
+    client.delete(SENTIMENT_SCHEDULED_KEY)
+    scored = 0
+    while True:
+        ids = client.lpop(SENTIMENT_PENDING_KEY, batch_size)
+        if not ids:
+            return scored
+        scored += score_reviews([int(i) for i in ids])
+
+
+def score_reviews(review_ids) -> int:
+    """Score one batch: one SELECT, one conditional bulk UPDATE, then the leaderboard.
+
+    The owner may edit a pending review while its text is being scored. The
+    UPDATE only lands where the row is still unscored and still holds the text
+    that was scored, and the stats delta comes from the rows it RETURNs, so an
+    edited review keeps its NULL score (the edit re-queued it) and the current
+    rating is what gets counted.
+    """
+    rows = db.session.execute(
+        select(Review.review_id, Review.comment, Market.type)
+        .join(Market, Market.market_id == Review.market_id)
+        .where(Review.review_id.in_(review_ids), Review.sentiment_score.is_(None), Market.is_active == db.true())
+    ).all()
+    if not rows:
+        return 0
+    scores = score_texts(r.comment for r in rows)
+    market_types = {r.review_id: r.type for r in rows}
+    scored = db.session.execute(
+        update(Review)
+        .where(
+            Review.review_id.in_(market_types),
+            Review.sentiment_score.is_(None),
+            Review.comment.is_not_distinct_from(case({r.review_id: r.comment for r in rows}, value=Review.review_id)),
+        )
+        .values(sentiment_score=case({r.review_id: s for r, s in zip(rows, scores)}, value=Review.review_id))
+        .returning(Review.review_id, Review.market_id, Review.rating, Review.timestamp,
+                   Review.duplicate_of, Review.sentiment_score)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    for r in scored:
+        if r.duplicate_of is not None:
+            continue  # flagged near-duplicates are scored but not counted
+        # trend points land in the bucket of the day the review was written
+        day = r.timestamp.date() if r.timestamp else None
+        update_leaderboard(r.market_id, r.rating, r.sentiment_score, market_types[r.review_id], day)
+    # cached first pages of the review listings show the score
+    if scored:
+        invalidate_tags(*{f"reviews:market:{r.market_id}" for r in scored})
+    return len(scored)
+
+
+@shared_task(name="leaderboard.publish_variants")
+def publish_leaderboard_variants():
+    """Refresh every weight-variant board; variant boards are snapshots, so schedule this."""
+    return publish_variants()
+
+
+@shared_task(name="leaderboard.reconcile")
+def reconcile_leaderboard_task(chunk_size: int = 1000):
+    """Periodic drift repair; returns the run's metrics (None if a rebuild was running)."""
+    return reconcile_leaderboard(chunk_size=chunk_size)
@@ -1,9 +1,24 @@
+import gzip
+import hashlib
 import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
 import redis
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
 from flask import current_app, make_response, request
 from flask_jwt_extended import get_jwt, verify_jwt_in_request
 
+try:
+    import brotli
+except ImportError:  # optional: without it cached bodies are stored gzip-only
+    brotli = None
+
 
 def redis_client():
     """Get the redis client from current_app.
@@ -14,6 +29,44 @@ def redis_client():
     return current_app.redis_client
 
 
+@contextmanager
+def staged_swap(keys=(), client=None):
+    """Rebuild Redis keys under temporary names, then swap them all in at once.
+
+    Yields tmp(key) -> temporary name; write the new contents there (keys not
+    passed up front are registered on first use). On exit every temporary key
+    that was written is RENAMEd over its live key and live keys left unwritten
+    are deleted, in one MULTI, so readers never see a half-built set. If the
+    block raises, the temporary keys are dropped and the live ones kept.
+    """
+    client = client or redis_client()
+    token = uuid.uuid4().hex
+    staged = {key: f"{key}:tmp:{token}" for key in keys}
+
+    def tmp(key):
+        return staged.setdefault(key, f"{key}:tmp:{token}")
+
+    try:
+        yield tmp
+    except BaseException:
+        if staged:
+            client.delete(*staged.values())
+        raise
+    if not staged:
+        return
+    pipe = client.pipeline(transaction=False)
+    for tmp_key in staged.values():
+        pipe.exists(tmp_key)
+    built = pipe.execute()
+    pipe = client.pipeline()
+    for (key, tmp_key), exists in zip(staged.items(), built):
+        if exists:
+            pipe.rename(tmp_key, key)
+        else:
+            pipe.delete(key)  # nothing left to put in it
+    pipe.execute()
+
+
 # ---- Key builders (prefix them with a namespace) ----
 def key_user_cutover(uid: int | str) -> str:
     """Generate a Redis key for user-specific data, e.g., login sessions."""
@@ -39,19 +92,313 @@ def _http_ns() -> str:
     ns = current_app.config.get('REDIS_NAMESPACE', 'app')
     return f"{ns}:http"
 
+class LocalCache:
+    """Bounded in-process LRU with per-entry TTL (the tier in front of Redis).
+
+    Entries remember their tags so a pub/sub invalidation message can drop
+    exactly the dependent keys. `version` bumps on every invalidation; a
+    writer that read Redis before an invalidation landed passes the version
+    it started with and its (possibly stale) value is discarded.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value, tags)
+        self._by_tag = {}           # tag -> set(keys)
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float, tags=(), version: int | None = None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return  # an invalidation arrived while we were reading Redis
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            self.version += 1
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+            self._by_tag.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key):
+        # caller holds the lock
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+_local = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+def local_cache() -> LocalCache:
+    """Per-process LocalCache, sized by LOCAL_CACHE_MAXSIZE."""
+    global _local
+    if _local is None:
+        _local = LocalCache(current_app.config.get("LOCAL_CACHE_MAXSIZE", 1024))
+    return _local
+
+def _invalidation_channel() -> str:
+    return f"{_http_ns()}:invalidate"
+
+def _ensure_listener():
+    """Start (once per worker process) the pub/sub thread that keeps the local tier coherent.
+
+    Started lazily so pre-fork servers get one listener per worker, not one in the master.
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        cache = local_cache()
+        cache.clear()  # anything inherited across fork is unverified
+        client = redis_client()
+        channel = _invalidation_channel()
+        logger = current_app.logger
+
+        def listen():
+            while True:
+                try:
+                    pubsub = client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(channel)
+                    for message in pubsub.listen():
+                        tags = json.loads(message["data"])
+                        cache.invalidate_tags(tags)
+                except Exception as e:
+                    # Messages may have been missed while disconnected; start clean.
+                    logger.warning(f"Local cache invalidation listener error: {e}")
+                    cache.clear()
+                    time.sleep(1)
+
+        threading.Thread(target=listen, name="local-cache-invalidator", daemon=True).start()
+        _listener_pid = os.getpid()
+
+
+def _tag_key(tag: str) -> str:
+    # Generation counter for one tag, e.g. "app:http:tag:market:42"
+    return f"{_http_ns()}:tag:{tag}"
+
+def _resolve_tags(tags, args, kwargs) -> list[str]:
+    if tags is None:
+        return []
+    if callable(tags):
+        tags = tags(*args, **kwargs)
+    return [str(t) for t in tags]
+
+def invalidate_tags(*tags: str) -> None:
+    """Invalidate every cached response tagged with any of `tags`.
+
+    Each tag has a generation counter that is folded into the cache key of
+    every entry carrying it, so bumping the counter makes all dependent
+    variants unreachable in O(1) per tag. Orphaned entries age out via TTL;
+    nothing is ever SCANned or deleted by pattern.
+    """
+    if not tags:
+        return
+    pipe = redis_client().pipeline(transaction=False)
+    for tag in tags:
+        pipe.incr(_tag_key(tag))
+    #Tell every worker's in-process tier to drop its copies as well.
+    pipe.publish(_invalidation_channel(), json.dumps(list(tags)))
+    pipe.execute()
+    if _local is not None:
+        _local.invalidate_tags(tags)
+
+_META_FIELDS = ("etag", "fresh_until", "delta")
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 9
+
+def _etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def _encode_variants(body: bytes, min_size: int) -> dict:
+    """Pre-compress a body once at fill time.
+
+    Small bodies are kept as-is. Larger ones are stored only compressed
+    (gzip always, brotli when installed); the rare identity-only client
+    gets a gzip.decompress instead of every entry carrying a raw copy.
+    """
+    if len(body) < min_size:
+        return {"body": body}
+    variants = {"gzip": gzip.compress(body, _GZIP_LEVEL)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=_BROTLI_QUALITY)
+    return variants
+
+def _accepted_encoding() -> str | None:
+    """Best pre-compressed variant the client accepts, by our preference."""
+    for encoding in ("br", "gzip"):
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+def _servable(entry: dict) -> bool:
+    """Whether this (possibly partial) entry has a variant the current client can take."""
+    if entry.get("body") is not None or entry.get("gzip") is not None:
+        return True
+    return entry.get("br") is not None and bool(request.accept_encodings["br"])
+
+def _read_entry(key: str, encoding: str | None) -> dict | None:
+    """Fetch a cached entry: etag, fresh_until (epoch seconds), delta (recompute seconds)
+    and only the body variants this client can use (one HMGET, not the whole hash)."""
+    fields = list(_META_FIELDS) + ([encoding] if encoding else []) + ["body"]
+    try:
+        values = redis_client().hmget(key, fields)
+        entry = dict(zip(fields, values))
+        if entry["body"] is None and entry.get(encoding) is None and encoding != "gzip":
+            # e.g. brotli requested but the writer had no brotli: fall back to gzip
+            entry["gzip"] = redis_client().hget(key, "gzip")
+    except redis.ResponseError:
+        return None  # e.g. a plain string left behind by an older entry format
+    if entry["etag"] is None or not any(entry.get(f) for f in ("body", "gzip", "br")):
+        return None
+    entry["etag"] = entry["etag"].decode()
+    entry["fresh_until"] = float(entry["fresh_until"] or 0)
+    entry["delta"] = float(entry["delta"] or 0)
+    return entry
+
+def _write_entry(key: str, entry: dict, ttl: int) -> None:
+    pipe = redis_client().pipeline()  # MULTI: readers never see a half-written hash
+    pipe.delete(key)
+    pipe.hset(key, mapping={k: v for k, v in entry.items() if v is not None})
+    pipe.expire(key, ttl)
+    pipe.execute()
+
+def _needs_refresh(entry: dict, beta: float) -> bool:
+    """True once the entry is past its soft expiry, or probabilistically just before it.
+
+    Probabilistic early expiration (XFetch): each reader volunteers with a
+    probability that grows as expiry nears and with how long the value took
+    to compute, so one request refreshes ahead of time instead of all of
+    them missing at once.
+    """
+    now = time.time()
+    if now >= entry["fresh_until"]:
+        return True
+    if beta <= 0 or entry["delta"] <= 0:
+        return False
+    return now - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["fresh_until"]
+
 # key_builder must be a callable returning a unique Redis key(often just a constant or a lambda that inspects request.args)
-def redis_cache(key_builder,  ttl: int = 300, content_type: str = "application/json", vary_by_user: bool = False): #ttl time to live in seconds.
+def redis_cache(key_builder,  ttl: int = 300, content_type: str = "application/json", vary_by_user: bool = False,
+                tags=None, local_ttl: float | None = None, soft_ttl: int | None = None,
+                early_refresh_beta: float = 1.0, lock_timeout: float = 10, lock_wait: float = 2.0,
+                max_age: int = 0, compress_min_size: int = 1024): #ttl time to live in seconds.
     """Cache a Flask Response body for read-heavy endpoints.
- - key_builder: callable(*args, **kwargs) -> str; if None, derive from request.path + sorted querystring
+ - key_builder: callable(*args, **kwargs) -> str; if None, derive from request.path + sorted querystring.
+   A key_builder returning None skips the cache for that request (e.g. only cache first pages)
 - ttl: seconds to keep the cache  - vary_by_user: include user id (if any) in the cache key
    - content_type: returned Content-Type for cached hits
+   - tags: iterable of entity tags (e.g. ["markets:list", "market:42"]) or callable(*args, **kwargs)
+     returning one; invalidate_tags(tag) drops every entry carrying that tag
+   - local_ttl: if set, also keep the body in this worker's LocalCache for up to this many
+     seconds; hits skip Redis entirely and pub/sub invalidation keeps the copies coherent
+   - soft_ttl: if set, the entry is fresh for soft_ttl seconds and may be served stale
+     (while one caller refreshes it) until the hard `ttl`
+   - early_refresh_beta: XFetch aggressiveness for refreshing before expiry; 0 disables it
+   - lock_timeout / lock_wait: single-flight recompute lock lifetime, and how long callers
+     with nothing to serve wait for the lock holder before computing themselves
+   - max_age: browser/proxy max-age for Cache-Control; every response carries an ETag and a
+     matching If-None-Match gets a bodyless 304
+   - compress_min_size: bodies at least this large are stored pre-compressed (gzip, plus
+     brotli if installed) and served with Content-Encoding per the client's Accept-Encoding
    """
+    fresh_for = min(soft_ttl or ttl, ttl)
+    cache_control = f"{'private' if vary_by_user else 'public'}, max-age={max_age}, must-revalidate"
+
+    def respond(entry):
+        #Serve the best stored variant the client accepts, then tag it and turn it into a
+        #304 if the client already has this representation.
+        for encoding in ("br", "gzip"):
+            if entry.get(encoding) is not None and request.accept_encodings[encoding]:
+                resp = make_response(entry[encoding], 200, {'Content-Type': content_type, 'Content-Encoding': encoding})
+                etag = f"{entry['etag']}-{encoding}"
+                break
+        else:
+            body = entry.get("body")
+            if body is None:
+                body = gzip.decompress(entry["gzip"])
+            resp = make_response(body, 200, {'Content-Type': content_type})
+            etag = entry["etag"]
+        resp.vary.add('Accept-Encoding')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = cache_control
+        return resp.make_conditional(request)
+
     def decorator(fn):
+        def compute(key, args, kwargs):
+            #Call the original function and cache a 200 response.
+            #make_response normalizes (body, status) tuples so the status check below sees them.
+            started = time.perf_counter()
+            resp = make_response(fn(*args, **kwargs))
+            if getattr(resp, 'status_code', None) != 200:
+                return resp, None
+            body = resp.get_data()
+            entry = {
+                "etag": _etag(body),
+                "fresh_until": time.time() + fresh_for,
+                "delta": time.perf_counter() - started,
+                **_encode_variants(body, compress_min_size),
+            }
+            try:
+                #Store the entry in Redis with the key and (hard) TTL.
+                _write_entry(key, entry, ttl)
+            except redis.RedisError as e:
+                current_app.logger.warning(f"Failed to cache {key}: {e}")
+            return respond(entry), entry
+
         @wraps(fn)
         def wrapper(*args, **kwargs):
             #Build a stable base key
             if key_builder:
                 base = key_builder(*args, **kwargs)
+                if base is None:
+                    return fn(*args, **kwargs)
             else:
                 qs = "&".join(f"{k}={v}" for k, v in sorted(request.args.items()))
                 base = f"{request.path}?{qs}" if qs else f"route:{request.path}"
@@ -67,23 +414,58 @@ def redis_cache(key_builder,  ttl: int = 300, content_type: str = "application/j
                         key = f"{key}::u={uid}"
                 except Exception:
                     pass
-            cached = redis_client().get(key)
-            if cached is not None:
-                return make_response(
-                    cached,
-                    200,
-                    {'Content-Type': content_type}
-                )
-            #If no cache hit, call the original function.
-            resp = fn(*args, **kwargs)
+            tag_list = _resolve_tags(tags, args, kwargs)
+            local_key = key
+            if local_ttl:
+                _ensure_listener()
+                cache = local_cache()
+                version = cache.version
+                entry = cache.get(local_key)
+                #Entries read from Redis carry only the variants their reader needed.
+                if entry is not None and time.time() < entry["fresh_until"] and _servable(entry):
+                    return respond(entry)
+            if tag_list:
+                #Fold the current generation of every tag into the key (one MGET round trip).
+                #A bumped generation means a new key, so stale entries are simply never read again.
+                gens = redis_client().mget([_tag_key(t) for t in tag_list])
+                key = f"{key}::g=" + ".".join(g.decode() if g else "0" for g in gens)
+
+            def serve(entry):
+                if local_ttl:
+                    remaining = entry["fresh_until"] - time.time()
+                    if remaining > 0:
+                        cache.set(local_key, entry, min(local_ttl, remaining), tag_list, version)
+                return respond(entry)
+
+            encoding = _accepted_encoding()
+            entry = _read_entry(key, encoding)
+            if entry is not None and not _needs_refresh(entry, early_refresh_beta):
+                return serve(entry)
+
+            #Miss or due for refresh: single-flight the recompute behind a short Redis lock.
+            lock = redis_client().lock(f"{key}:lock", timeout=lock_timeout)
+            if not lock.acquire(blocking=False):
+                if entry is not None:
+                    return serve(entry)  # someone else is refreshing; stale beats a DB pile-up
+                deadline = time.monotonic() + lock_wait
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    entry = _read_entry(key, encoding)
+                    if entry is not None:
+                        return serve(entry)
+                #Lock holder is slow or died; compute without it rather than fail.
+                resp, _ = compute(key, args, kwargs)
+                return resp
             try:
-                if getattr(resp, 'status_code', None) == 200:
-                    body = resp.get_data(as_text=True) #Get the response body as text.
-                    #Store the response body in Redis with the key and TTL.
-                    redis_client().setex(key, ttl, body)
+                resp, fresh = compute(key, args, kwargs)
             finally:
-                #Always return the original response object.
-                return resp
+                try:
+                    lock.release()
+                except redis.exceptions.LockError:
+                    pass  # expired while computing; another caller may already hold it
+            if fresh is not None and local_ttl:
+                cache.set(local_key, fresh, min(local_ttl, fresh_for), tag_list, version)
+            return resp
         return wrapper
     return decorator
     #Return the original response to flask
\ No newline at end of file
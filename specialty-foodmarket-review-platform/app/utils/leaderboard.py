@@ -1,17 +1,60 @@
 import math
+import numpy as np
+import time
+from datetime import datetime, timedelta, timezone
+import redis
 from flask import current_app
 from app.database import db
 from app.models.models import Market, Review
-from app.utils.cache import redis_client
+from app.utils.cache import redis_client, staged_swap
+from app.validators.validators import MARKET_TYPES, VARIANT_NAME
 
 # plain dict that lets you tweak the influence of each factor without changing code further down.
-# Later we can load these numbers from env variables or even Redis hash for live A/B testing.
+# A/B weight sets live in Redis hashes instead, see set_weights() / publish_variants() below.
 WEIGHTS = {
     "avg_rating": 0.6,
     "avg_sentiment": 0.3,
     "review_ct": 0.1,
 }
 
+# Sentiment distribution: compound scores in [-1, 1] split into equal-width bins,
+# kept as hist:<bin> counters next to the running sums in market:{id}:stats.
+SENTIMENT_BINS = 10
+
+def stats_key(market_id):
+    return f"market:{market_id}:stats"
+
+def sentiment_bin(score):
+    """Bin index 0..SENTIMENT_BINS-1 for a compound score (1.0 lands in the top bin)."""
+    return min(int((score + 1) / 2 * SENTIMENT_BINS), SENTIMENT_BINS - 1)
+
+def sentiment_bin_expr(column):
+    """SQL twin of sentiment_bin(). FLOOR before the CAST: PostgreSQL's CAST to integer rounds."""
+    return db.case(
+        (column >= 1.0, SENTIMENT_BINS - 1),
+        else_=db.cast(db.func.floor((column + 1) / 2 * SENTIMENT_BINS), db.Integer),
+    )
+
+def sentiment_bin_edges():
+    width = 2 / SENTIMENT_BINS
+    return [(round(-1 + i * width, 4), round(-1 + (i + 1) * width, 4)) for i in range(SENTIMENT_BINS)]
+
+# Trending: every review adds points to its market in a daily ZSET (trending:day:20240131).
+# Buckets expire on their own a little after the longest window, and a window board is a
+# ZUNIONSTORE of its days with older days weighted down, cached for a few minutes.
+TRENDING_WINDOWS = {"7d": (7, 0.85), "30d": (30, 0.95)}  # window -> (days, per-day decay)
+TREND_BUCKET_TTL = (30 + 2) * 86400
+TRENDING_CACHE_TTL = 300
+
+def trend_key(day=None):
+    day = day or datetime.now(timezone.utc).date()
+    return f"trending:day:{day:%Y%m%d}"
+
+def trend_points(rating, sentiment):
+    """One review's contribution to its day's bucket: the quality part of _composite(),
+    summed rather than averaged so volume shows up as momentum."""
+    return rating * WEIGHTS["avg_rating"] + (sentiment + 1) * 2.5 * WEIGHTS["avg_sentiment"]
+
 #Private helper: Given already averaged-values, return a single "popularity" number.
 def _composite(avg_rating, avg_sent, review_ct):
     '''Return a 0-10 popularity score.'''
@@ -23,65 +66,537 @@ def _composite(avg_rating, avg_sent, review_ct):
 
     return round(score, 4)
 
-#Public function we call right after one new review is committed.
-def update_leaderboard(market_id, rating, sentiment):
+# Server-side twin of _composite(): applies a delta to a market's running sums and
+# re-scores it in the same atomic step, so the ZSET can never lag its stats hash.
+# KEYS: stats hash, the review's daily trending bucket, the rebuild lock and its
+#       touched-markets set, then every board ZSET the market is ranked on (global, per-type)
+# ARGV: w_rating, w_sentiment, w_count, member, rating_delta, sent_delta, count_delta,
+#       trend_points, trend_ttl, then optional (hist field, delta) pairs
+_APPLY_STATS_LUA = """
+local rating_sum = tonumber(redis.call('HINCRBYFLOAT', KEYS[1], 'rating_sum', ARGV[5]))
+local sent_sum = tonumber(redis.call('HINCRBYFLOAT', KEYS[1], 'sent_sum', ARGV[6]))
+local count = tonumber(redis.call('HINCRBYFLOAT', KEYS[1], 'count', ARGV[7]))
+for i = 10, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if tonumber(ARGV[8]) ~= 0 then
+    local points = tonumber(redis.call('ZINCRBY', KEYS[2], ARGV[8], ARGV[4]))
+    if points <= 0.00005 then
+        redis.call('ZREM', KEYS[2], ARGV[4])
+    end
+    redis.call('EXPIRE', KEYS[2], ARGV[9])
+end
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('SADD', KEYS[4], ARGV[4])
+end
+if count <= 0 then
+    redis.call('DEL', KEYS[1])
+    for k = 5, #KEYS do
+        redis.call('ZREM', KEYS[k], ARGV[4])
+    end
+    return false
+end
+local score = (rating_sum / count) * tonumber(ARGV[1])
+    + (sent_sum / count + 1) * 2.5 * tonumber(ARGV[2])
+    + math.log10(count + 1) * 10 * tonumber(ARGV[3])
+score = math.floor(score * 10000 + 0.5) / 10000
+for k = 5, #KEYS do
+    redis.call('ZADD', KEYS[k], score, ARGV[4])
+end
+-- Lua numbers come back to the client as integers; send the score as a string
+return tostring(score)
+"""
+_apply_stats_script = None
+
+def _suggest():
+    # imported late: the typeahead index itself ranks by board_key() from this module
+    from app.services import suggest_service
+    return suggest_service
+
+def board_key(market_type=None):
+    """The global leaderboard ZSET, or the per-type one (e.g. leaderboard:type:butcher)."""
+    return f"leaderboard:type:{market_type}" if market_type else "leaderboard"
+
+def apply_stats_delta(market_id, rating_delta, sent_delta, count_delta, hist_deltas=None, market_type=None,
+                      trend_delta=0.0, trend_day=None):
+    """Apply a delta to market:{id}:stats and re-score the market in one round trip (EVALSHA).
+
+    The score goes to the global board and, when market_type is given, to that type's board.
+    trend_delta is added to the market's points in the trend_day bucket (default: today).
+
+    Returns the new composite score, or None if the market has no reviews left
+    (its stats hash and leaderboard entry are removed).
+    """
+    global _apply_stats_script
+    client = redis_client()
+    if _apply_stats_script is None:
+        # register_script hashes the source once; calls use EVALSHA and reload on NOSCRIPT
+        _apply_stats_script = client.register_script(_APPLY_STATS_LUA)
+    args = [
+        WEIGHTS["avg_rating"], WEIGHTS["avg_sentiment"], WEIGHTS["review_ct"],
+        market_id, rating_delta, sent_delta, count_delta,
+        round(trend_delta, 4), TREND_BUCKET_TTL,
+    ]
+    for field, delta in (hist_deltas or {}).items():
+        args += [field, delta]
+    keys = [stats_key(market_id), trend_key(trend_day), REBUILD_LOCK_KEY, REBUILD_TOUCHED_KEY, board_key()]
+    keys += [board_key(market_type)] if market_type else []
+    score = _apply_stats_script(keys=keys, args=args, client=client)
+    score = float(score) if score is not None else None
+    _suggest().rescore_market(market_id, score)  # typeahead ranks by the same score
+    return score
+
+#Public function we call right after one new review is scored.
+def update_leaderboard(market_id, rating, sentiment, market_type=None, day=None):
     """Update the leaderboard for a market after a new review.
 
+    Running sums live in one Redis Hash per market (market:42:stats) - sums instead of
+    averages so each review is an O(1) increment without reading. The increment and the
+    composite re-score run together in a Lua script: one round trip, and concurrent
+    reviews for the same market can't interleave between the two.
+
     This function uses redis_client() from cache module which requires
     an application context.
     """
-    client = redis_client()
-    hkey = f"market:{market_id}:stats" # store running totals in one Redis Hash per market. ex hash: market:42:stats
-    pipe = client.pipeline() # opens redis pipeline, which allows multiple commands sent as on round trip, guaranteeing atomicity from the clien's point of view and saving network latency.
-    pipe.hincrbyfloat(hkey, "rating_sum", rating) # adds the new 1-5 integer
-    pipe.hincrbyfloat(hkey, "sent_sum", sentiment) # adds the sentiment float
-    pipe.hincrbyfloat(hkey, "count", 1) # Increments total reviews
-    #Sums instead of averages because sums let us keep integer math and update in O(1) without reading.
-    pipe.hgetall(hkey) #hgetall is queued last. .execute() runs the pipeline and returns a list of results.
-    data = pipe.execute()[-1] # dict after update
-    # [-1] is that dict containing the post-increment values,  e.g.: {b'rating_sum': b'127', b'sent_sum': b'23.5', b'count': b'28'}
-    #convert byte strings into python numbers
-    rating_sum = float(data.get(b"rating_sum", 0))
-    sent_sum = float(data.get(b"sent_sum", 0))
-    review_ct = int(data.get(b"count", 0))
-
-    if review_ct == 0:
-        return  # Avoid division by zero
-
-    #compute fresh per-market averages without touching Postgres.
-    avg_rating = rating_sum / review_ct
-    avg_sent = sent_sum / review_ct
-    score = _composite(avg_rating, avg_sent, review_ct)
-
-    #one call gives the leaderboard score
-    client.zadd("leaderboard", {market_id: score})
-
-    #Write into a global Redis ZSET:
-    #key: "leaderboard"
-    #member: the intege market_id
-    #score: the composite popularity
-
     #Redis ZSET's keep their members sorted by score, so later a simple:
     #client.zrevrange("leaderboard", 0, 9, withscores=True)
     #returns the top 10 markets in descending order.
+    return apply_stats_delta(
+        market_id, rating, sentiment, 1, {f"hist:{sentiment_bin(sentiment)}": 1}, market_type,
+        trend_delta=trend_points(rating, sentiment), trend_day=day,
+    )
 
 
-def rebuild_leaderboard():
-    """Rebuild the entire leaderboard from database.
+def remove_review(market_id, rating, sentiment, market_type=None, day=None):
+    """Subtract one scored review from its market's stats, boards and trending bucket."""
+    return apply_stats_delta(
+        market_id, -rating, -sentiment, -1, {f"hist:{sentiment_bin(sentiment)}": -1}, market_type,
+        trend_delta=-trend_points(rating, sentiment), trend_day=day,
+    )
+
+def replace_review(market_id, old, new, market_type=None, day=None):
+    """Swap a scored review's (rating, sentiment) for new values as one exact delta."""
+    (old_rating, old_sent), (new_rating, new_sent) = old, new
+    hist = {}
+    if sentiment_bin(old_sent) != sentiment_bin(new_sent):
+        hist = {f"hist:{sentiment_bin(old_sent)}": -1, f"hist:{sentiment_bin(new_sent)}": 1}
+    return apply_stats_delta(
+        market_id, new_rating - old_rating, new_sent - old_sent, 0, hist, market_type,
+        trend_delta=trend_points(new_rating, new_sent) - trend_points(old_rating, old_sent), trend_day=day,
+    )
+
+def remove_market(market_id):
+    """Take a market off every board it can be ranked on and drop its stats.
+
+    Trending is cleaned in the daily buckets still alive and today's cached windows.
+    """
+    client = redis_client()
+    today = datetime.now(timezone.utc).date()
+    boards = [board_key()] + [board_key(t) for t in MARKET_TYPES]
+    boards += [variant_board_key(v.decode()) for v in client.smembers(VARIANTS_KEY)]
+    boards += [trend_key(today - timedelta(days=age)) for age in range(TREND_BUCKET_TTL // 86400)]
+    boards += [f"trending:{window}:{today:%Y%m%d}" for window in TRENDING_WINDOWS]
+    pipe = client.pipeline()
+    pipe.delete(stats_key(market_id))
+    for board in boards:
+        pipe.zrem(board, market_id)
+    pipe.execute()
+
+def stats_aggregate_query():
+    """One GROUP BY market_id over scored, non-duplicate reviews of active markets.
+
+    Each row carries the market's type plus exactly what update_leaderboard keeps in
+    market:{id}:stats: market_id, rating_sum, sent_sum, count, hist_0..hist_N.
+    """
+    bin_col = sentiment_bin_expr(Review.sentiment_score)
+    return (
+        db.select(
+            Review.market_id,
+            Market.type,
+            db.func.sum(Review.rating).label("rating_sum"),
+            db.func.sum(Review.sentiment_score).label("sent_sum"),
+            db.func.count().label("count"),
+            *[db.func.sum(db.case((bin_col == i, 1), else_=0)).label(f"hist_{i}") for i in range(SENTIMENT_BINS)],
+        )
+        .join(Market, Market.market_id == Review.market_id)
+        .where(Market.is_active == db.true(), Review.sentiment_score.isnot(None), Review.duplicate_of.is_(None))
+        .group_by(Review.market_id, Market.type)
+    )
+
+def stats_mapping(row):
+    """market:{id}:stats hash fields for one stats_aggregate_query() row (empty bins omitted)."""
+    mapping = {"rating_sum": float(row.rating_sum), "sent_sum": float(row.sent_sum), "count": int(row.count)}
+    for i in range(SENTIMENT_BINS):
+        n = int(getattr(row, f"hist_{i}"))
+        if n:
+            mapping[f"hist:{i}"] = n
+    return mapping
+
+REBUILD_LOCK_KEY = "leaderboard:rebuild:lock"  # also held by reconcile_leaderboard()
+REBUILD_TOUCHED_KEY = "leaderboard:rebuild:touched"  # markets apply_stats_delta() wrote while it was held
+
+def rebuild_leaderboard(chunk_size=1000):
+    """Rebuild the entire leaderboard, the per-type boards and every market:{id}:stats hash.
+
+    One aggregate query is streamed in chunks into temporary ZSETs and hashes which
+    are then RENAMEd over the live ones in one MULTI, so readers never see an empty
+    or half-built board. Stats hashes of markets missing from the aggregate are
+    deleted by the same swap. Markets that apply_stats_delta() wrote to meanwhile
+    may have lost an increment to the swap; they are re-checked against the
+    database afterwards. A Redis lock keeps concurrent workers from rebuilding at
+    the same time. Returns False if another rebuild holds the lock.
 
     This function can be called as a Celery task or directly.
     Requires an application context.
     """
     client = redis_client()
+    lock = client.lock(REBUILD_LOCK_KEY, timeout=600)
+    if not lock.acquire(blocking=False):
+        return False
+    try:
+        client.delete(REBUILD_TOUCHED_KEY)
+        # live hashes are staged too, so those of markets with nothing left to count
+        # (reviews flagged or unscored, market deactivated) are deleted by the swap
+        live = [key.decode() for key in client.scan_iter(match=stats_key('*'), count=chunk_size)]
+        result = db.session.execute(stats_aggregate_query().execution_options(yield_per=chunk_size))
+        with staged_swap([board_key()] + [board_key(t) for t in MARKET_TYPES] + live, client) as tmp_key:
+            for rows in result.partitions():
+                lock.reacquire()  # reset the timeout each chunk, however long the build takes
+                pipe = client.pipeline(transaction=False)
+                for row in rows:
+                    mapping = stats_mapping(row)
+                    pipe.hset(tmp_key(stats_key(row.market_id)), mapping=mapping)
+                    count = mapping["count"]
+                    score = _composite(mapping["rating_sum"] / count, mapping["sent_sum"] / count, count)
+                    pipe.zadd(tmp_key(board_key()), {row.market_id: score})
+                    pipe.zadd(tmp_key(board_key(row.type)), {row.market_id: score})
+                pipe.execute()
+        db.session.rollback()
+        _repair_touched(client, chunk_size)
+        _suggest().refresh_suggest_scores()
+        return True
+    finally:
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            pass # lock expired mid-rebuild
+
+def _repair_touched(client, chunk_size):
+    """Re-check the markets apply_stats_delta() wrote to while the rebuild held the lock."""
+    touched = [int(member) for member in client.smembers(REBUILD_TOUCHED_KEY)]
+    client.delete(REBUILD_TOUCHED_KEY)
+    for start in range(0, len(touched), chunk_size):
+        markets = db.session.execute(
+            db.select(Market.market_id, Market.type).where(Market.market_id.in_(touched[start:start + chunk_size]))
+        ).all()
+        db.session.rollback()
+        for market_id, market_type in markets:
+            _repair_market(client, market_id, market_type, dry_run=False)
+
+
+
+# Reconciliation: compare each market's stats hash and board scores with the database and
+# repair only those that drifted, instead of rebuilding everything.
+RECONCILE_METRICS_KEY = "leaderboard:reconcile:last"
+
+def _normalize_stats(raw):
+    """Stats hash (HGETALL, bytes) -> numeric fields, zeroed histogram bins dropped."""
+    stats = {}
+    for field, value in raw.items():
+        field = field.decode()
+        value = float(value)
+        if field.startswith("hist:") and not value:
+            continue
+        stats[field] = value
+    return stats
+
+def _stats_drift(actual, expected, scores, market_type):
+    """Why a market's Redis state disagrees with its expected mapping, or None.
+
+    scores: (global, type board) ZSCOREs. A market without expected stats must have
+    neither a hash nor a board entry.
+    """
+    if expected is None:
+        return "orphan" if actual or any(s is not None for s in scores) else None
+    if not actual:
+        return "missing"
+    if set(actual) != set(expected) or any(
+        not math.isclose(actual[f], float(v), rel_tol=1e-9, abs_tol=1e-6) for f, v in expected.items()
+    ):
+        return "stats"
+    count = expected["count"]
+    score = _composite(expected["rating_sum"] / count, expected["sent_sum"] / count, count)
+    if any(s is None or abs(s - score) > 1.5e-4 for s in scores):
+        return "board"
+    return None
+
+def _expected_stats(market_ids):
+    """{market_id: stats mapping} for the given markets straight from the database."""
+    rows = db.session.execute(stats_aggregate_query().where(Review.market_id.in_(market_ids)))
+    return {row.market_id: stats_mapping(row) for row in rows}
+
+def _read_market_state(client, markets):
+    """HGETALL + global/type ZSCOREs for [(market_id, type)] in one pipeline."""
+    pipe = client.pipeline(transaction=False)
+    for market_id, market_type in markets:
+        pipe.hgetall(stats_key(market_id))
+        pipe.zscore(board_key(), market_id)
+        pipe.zscore(board_key(market_type), market_id)
+    replies = pipe.execute()
+    return [(_normalize_stats(replies[i]), replies[i + 1:i + 3]) for i in range(0, len(replies), 3)]
+
+def _repair_market(client, market_id, market_type, dry_run):
+    """Re-check one drifted market and overwrite its Redis state from the database.
+
+    The hash is WATCHed across the check, so a concurrent apply_stats_delta() aborts the
+    repair instead of being overwritten; the market is picked up again on the next run.
+    Returns the drift kind if it was (or, with dry_run, would be) repaired.
+    """
+    hkey = stats_key(market_id)
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(hkey)
+            actual = _normalize_stats(pipe.hgetall(hkey))
+            scores = [pipe.zscore(board_key(), market_id), pipe.zscore(board_key(market_type), market_id)]
+            expected = _expected_stats([market_id]).get(market_id)
+            db.session.rollback()  # don't hold a snapshot across markets
+            drift = _stats_drift(actual, expected, scores, market_type)
+            if drift is None or dry_run:
+                pipe.unwatch()
+                return drift
+            pipe.multi()
+            pipe.delete(hkey)
+            if expected is None:
+                for board in [board_key()] + [board_key(t) for t in MARKET_TYPES]:
+                    pipe.zrem(board, market_id)
+            else:
+                pipe.hset(hkey, mapping=expected)
+                count = expected["count"]
+                score = _composite(expected["rating_sum"] / count, expected["sent_sum"] / count, count)
+                pipe.zadd(board_key(), {market_id: score})
+                pipe.zadd(board_key(market_type), {market_id: score})
+            pipe.execute()
+            _suggest().rescore_market(market_id, score if expected is not None else None)
+            return drift
+        except redis.exceptions.WatchError:
+            return None
+
+def _sweep_orphans(client, board, market_type, members, dry_run):
+    """Re-check orphan candidates against the database and remove the ones still orphaned.
+
+    The candidates come from a chunked walk, so a market whose first review was scored
+    after its chunk was read shows up here too. Their stats hashes are WATCHed across
+    the re-check; a concurrent apply_stats_delta() aborts the sweep until the next run.
+    Returns the members removed (or, with dry_run, that would be).
+    """
+    if not members:
+        return []
+    ids = [int(member) for member in members]
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(*[stats_key(market_id) for market_id in ids])
+            ranked = dict(db.session.execute(
+                db.select(Market.market_id, Market.type).where(Market.market_id.in_(list(_expected_stats(ids))))
+            ).all())
+            db.session.rollback()
+            stale = [
+                member for member, market_id in zip(members, ids)
+                if market_id not in ranked or market_type not in (None, ranked[market_id])
+            ]
+            if not stale or dry_run:
+                pipe.unwatch()
+                return stale
+            pipe.multi()
+            pipe.zrem(board, *stale)
+            if market_type is None:
+                pipe.delete(*[stats_key(int(member)) for member in stale])
+            pipe.execute()
+        except redis.exceptions.WatchError:
+            return []
+    if market_type is None:
+        for member in stale:
+            _suggest().rescore_market(int(member), None)
+    return stale
+
+def reconcile_leaderboard(chunk_size=1000, dry_run=False):
+    """Find and repair drift between the stats hashes/boards and the database.
+
+    Markets are walked in market_id chunks; each chunk costs one aggregate query and one
+    Redis pipeline. Candidates are re-checked one by one before being repaired, so a
+    review scored between the two reads isn't mistaken for drift. Board members whose
+    market is gone, inactive or of another type are re-checked and removed at the end.
+    The lock's timeout is renewed as the walk goes.
+
+    Metrics of the run are returned and stored in leaderboard:reconcile:last.
+    Returns None if a rebuild or another reconcile holds the lock.
+    """
+    client = redis_client()
+    lock = client.lock(REBUILD_LOCK_KEY, timeout=600)
+    if not lock.acquire(blocking=False):
+        return None
+    started = time.monotonic()
+    metrics = {"checked": 0, "drifted": 0, "repaired": 0, "orphan": 0, "missing": 0, "stats": 0, "board": 0}
+    try:
+        ranked = {}  # market_id -> type for every market that should be on the boards
+        flagged = set()  # already counted (and repaired) in the chunk pass
+        last_id = 0
+        while True:
+            lock.reacquire()  # reset the timeout each chunk, however long the walk takes
+            markets = db.session.execute(
+                db.select(Market.market_id, Market.type, Market.is_active)
+                .where(Market.market_id > last_id)
+                .order_by(Market.market_id)
+                .limit(chunk_size)
+            ).all()
+            if not markets:
+                break
+            last_id = markets[-1].market_id
+            expected = _expected_stats([m.market_id for m in markets])
+            db.session.rollback()
+            candidates = []
+            for m, (actual, scores) in zip(markets, _read_market_state(client, [(m.market_id, m.type) for m in markets])):
+                if m.market_id in expected:
+                    ranked[m.market_id] = m.type
+                if _stats_drift(actual, expected.get(m.market_id), scores, m.type):
+                    candidates.append(m)
+            metrics["checked"] += len(markets)
+            for m in candidates:
+                drift = _repair_market(client, m.market_id, m.type, dry_run)
+                if drift:
+                    flagged.add(m.market_id)
+                    metrics["drifted"] += 1
+                    metrics[drift] += 1
+                    metrics["repaired"] += not dry_run
+
+        # board members with no market row left, or ranked on another type's board
+        for board, market_type in [(board_key(), None)] + [(board_key(t), t) for t in MARKET_TYPES]:
+            lock.reacquire()
+            stale = [
+                member for member, _ in client.zscan_iter(board)
+                if int(member) not in flagged
+                and (int(member) not in ranked or market_type not in (None, ranked[int(member)]))
+            ]
+            stale = _sweep_orphans(client, board, market_type, stale, dry_run)
+            metrics["drifted"] += len(stale)
+            metrics["orphan"] += len(stale)
+            metrics["repaired"] += 0 if dry_run else len(stale)
+    finally:
+        client.delete(REBUILD_TOUCHED_KEY)  # only a rebuild reads it; repairs here are WATCHed
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            pass
+
+    metrics["duration_ms"] = round((time.monotonic() - started) * 1000)
+    metrics["finished_at"] = int(time.time())
+    metrics["dry_run"] = int(dry_run)
+    client.hset(RECONCILE_METRICS_KEY, mapping=metrics)
+    current_app.logger.info(f"Leaderboard reconcile: {metrics}")
+    return metrics
+
+def trending_board(window="7d"):
+    """Return the ZSET key for a trending window, building it from the daily buckets if the
+    cached union has expired. Missing days are empty sets to ZUNIONSTORE, so gaps are free."""
+    days, decay = TRENDING_WINDOWS[window]
+    client = redis_client()
+    today = datetime.now(timezone.utc).date()
+    dest = f"trending:{window}:{today:%Y%m%d}"
+    if client.exists(dest):
+        return dest
+    buckets = {trend_key(today - timedelta(days=age)): decay ** age for age in range(days)}
     pipe = client.pipeline()
-    pipe.delete("leaderboard")
-    for m in Market.active_query():
-        stats = db.session.query(
-            db.func.avg(Review.rating).label("avg_rating"),
-            db.func.avg(Review.sentiment_score).label("avg_sent"),
-            db.func.count().label('review_ct')
-        ).filter_by(market_id=m.market_id).one()
-        score = _composite(stats.avg_rating, stats.avg_sent, stats.review_ct)
-        pipe.zadd("leaderboard", {m.market_id: score})
+    pipe.zunionstore(dest, buckets)
+    pipe.expire(dest, TRENDING_CACHE_TTL)
+    pipe.execute()
+    return dest
+
+
+# Weight variants: named weight sets in Redis hashes (leaderboard:weights:<variant>), each
+# published as its own board (leaderboard:variant:<variant>) so cohorts can be served
+# different rankings. Variant boards are recomputed from the stats hashes - no DB - by
+# publish_variants(), which scores every market for every variant in vectorized passes.
+VARIANTS_KEY = "leaderboard:variants"
+
+def weights_key(variant):
+    return f"leaderboard:weights:{variant}"
+
+def variant_board_key(variant):
+    return f"leaderboard:variant:{variant}"
+
+def set_weights(variant, **weights):
+    """Create or update a variant's weight set; unspecified weights fall back to WEIGHTS."""
+    if not VARIANT_NAME.fullmatch(variant):
+        raise ValueError(f"Invalid variant name {variant!r}: use 1-32 of a-z, 0-9, _ and -")
+    unknown = set(weights) - set(WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown weights: {', '.join(sorted(unknown))}")
+    pipe = redis_client().pipeline()
+    if weights:
+        pipe.hset(weights_key(variant), mapping=weights)
+    pipe.sadd(VARIANTS_KEY, variant)
     pipe.execute()
-    
\ No newline at end of file
+
+def delete_variant(variant):
+    pipe = redis_client().pipeline()
+    pipe.srem(VARIANTS_KEY, variant)
+    pipe.delete(weights_key(variant), variant_board_key(variant))
+    pipe.execute()
+
+def load_weights(variant):
+    """The variant's weights over the WEIGHTS defaults."""
+    stored = redis_client().hgetall(weights_key(variant))
+    return {**WEIGHTS, **{k.decode(): float(v) for k, v in stored.items() if k.decode() in WEIGHTS}}
+
+def load_stats_arrays(chunk_size=5000):
+    """Bulk-load the running sums of every ranked market into NumPy arrays.
+
+    Members come from the global board (every market with scored reviews is on it),
+    their stats hashes are read with pipelined HMGETs, chunk_size per round trip.
+    Returns (market_ids, rating_sum, sent_sum, count).
+    """
+    client = redis_client()
+    members = client.zrange(board_key(), 0, -1)
+    rows = []
+    for start in range(0, len(members), chunk_size):
+        pipe = client.pipeline(transaction=False)
+        for member in members[start:start + chunk_size]:
+            pipe.hmget(stats_key(int(member)), "rating_sum", "sent_sum", "count")
+        rows += pipe.execute()
+    # a hash can vanish between the ZRANGE and the HMGET (last review deleted): count 0
+    stats = np.array([[float(v or 0) for v in row] for row in rows], dtype=np.float64).reshape(-1, 3)
+    ids = np.array([int(m) for m in members], dtype=np.int64)
+    keep = stats[:, 2] > 0
+    return ids[keep], stats[keep, 0], stats[keep, 1], stats[keep, 2]
+
+def composite_scores(rating_sum, sent_sum, count, weights):
+    """Vectorized _composite() over arrays of running sums."""
+    scores = (
+        rating_sum / count * weights["avg_rating"]
+        + (sent_sum / count + 1) * 2.5 * weights["avg_sentiment"]
+        + np.log10(count + 1) * 10 * weights["review_ct"]
+    )
+    return np.round(scores, 4)
+
+def publish_variants(variants=None, chunk_size=5000):
+    """Recompute and publish the board of each variant (default: all registered ones).
+
+    Stats are loaded once and shared by every variant; each board is written to a temp
+    key and RENAMEd into place so readers never see it half-built.
+    Returns {variant: markets ranked}.
+    """
+    client = redis_client()
+    if variants is None:
+        variants = sorted(v.decode() for v in client.smembers(VARIANTS_KEY))
+    if not variants:
+        return {}
+    ids, rating_sum, sent_sum, count = load_stats_arrays(chunk_size)
+    members = ids.tolist()
+    published = {}
+    for variant in variants:
+        scores = composite_scores(rating_sum, sent_sum, count, load_weights(variant)).tolist()
+        board = variant_board_key(variant)
+        with staged_swap([board], client) as tmp:
+            for start in range(0, len(members), chunk_size):
+                client.zadd(tmp(board), dict(zip(members[start:start + chunk_size], scores[start:start + chunk_size])))
+        published[variant] = len(members)
+    return published
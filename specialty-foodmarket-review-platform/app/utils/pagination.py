@@ -0,0 +1,18 @@
+"""
+Keyset pagination shared by the market listing, review listings and search.
+
+A page is fetched with one row more than its size: if that row comes back
+another page exists, so no COUNT(*) is needed to decide on a next cursor.
+"""
+from app.database import db
+
+
+def page_rows(rows, limit: int, cursor_of):
+    """Split up to limit + 1 rows into (page, next cursor or None)."""
+    page = rows[:limit]
+    return page, (cursor_of(page[-1]) if len(rows) > limit else None)
+
+
+def fetch_page(stmt, limit: int, cursor_of):
+    """Run an ordered keyset select for one page: (rows, next cursor or None)."""
+    return page_rows(db.session.execute(stmt.limit(limit + 1)).all(), limit, cursor_of)
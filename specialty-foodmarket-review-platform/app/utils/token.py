@@ -12,11 +12,19 @@ from app.models.models import User
 ACCESS_EXPIRES = timedelta(minutes=15)
 REFRESH_EXPIRES = timedelta(days=14)
 
+# Scopes every token of a role carries, e.g. partners pulling /export/<entity>
+ROLE_SCOPES = {
+    "admin": ("export",),
+    "partner": ("export",),
+}
+
 def _base_claims(user: User, scopes=None) -> dict:
     """Base claims for JWT tokens."""
+    role = user.role or "user"
     return {
         "email_verified": bool(user.email_verified),
-        "scopes": scopes or [],
+        "roles": [role],
+        "scopes": sorted(set(scopes or []) | set(ROLE_SCOPES.get(role, ()))),
     }
 
 def issue_token_pair(user: User, scopes=None, *, new_family: bool = True, family_id: str | None=None) -> tuple[str, str, str]:
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, validate, validates, validates_schema, post_load, ValidationError
+from marshmallow import EXCLUDE, Schema, fields, validate, validates, validates_schema, pre_load, post_load, ValidationError
 from datetime import datetime, time
 import re
 
@@ -8,14 +8,111 @@ class ReviewSchema(Schema):
     rating = fields.Int(required=True, validate=validate.Range(min=1, max=5))
 
 
+class ReviewImportSchema(ReviewSchema):
+    '''Validate one review of a bulk import (partner migrations, NDJSON exports)'''
+    class Meta:
+        unknown = EXCLUDE  # partner rows and our own exports carry extra fields
+
+    market_id = fields.Int(required=True, validate=validate.Range(min=1))
+    user_id = fields.Int(required=True, validate=validate.Range(min=1))
+    timestamp = fields.DateTime(load_default=None)
+
+    @pre_load
+    def accept_comment(self, data, **kwargs):
+        '''Our own review export calls the text "comment"'''
+        if isinstance(data, dict) and 'review' not in data and 'comment' in data:
+            data = {**data, 'review': data['comment']}
+        return data
+
+
+class ReviewListQuerySchema(Schema):
+    '''Validate query string for the paginated review listings'''
+    limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=100))
+    # keyset cursor: opaque next_cursor from the previous page
+    cursor = fields.Str(load_default=None, validate=validate.Length(max=100))
+
+
+MARKET_TYPES = [
+    'farmers_market', 'grocery', 'butcher', 'bakery',
+    'deli', 'specialty', 'organic', 'seafood', 'other'
+]
+
+# Leaderboard weight variant names, as published (set_weights) and requested (?variant=)
+VARIANT_NAME = re.compile(r'^[a-z0-9_-]{1,32}$')
+
+
 class MarketSchema(Schema):
     '''Validate market creation input'''
     name = fields.Str(required=True, validate=validate.Length(min=2, max=100))
     address = fields.Str(required=True, validate=validate.Length(min=5, max=255))
-    type = fields.Str(required=True, validate=validate.OneOf([
-        'farmers_market', 'grocery', 'butcher', 'bakery',
-        'deli', 'specialty', 'organic', 'seafood', 'other'
-    ]))
+    type = fields.Str(required=True, validate=validate.OneOf(MARKET_TYPES))
+    latitude = fields.Float(load_default=None, validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(load_default=None, validate=validate.Range(min=-180, max=180))
+    # create even if similar markets exist (after the client has shown the candidates)
+    force = fields.Bool(load_default=False)
+
+    @validates_schema
+    def validate_coordinates(self, data, **kwargs):
+        '''Coordinates come as a pair or not at all'''
+        if (data.get('latitude') is None) != (data.get('longitude') is None):
+            raise ValidationError('latitude and longitude must be given together.', 'latitude')
+
+
+class MarketListQuerySchema(Schema):
+    '''Validate query string for the paginated market listing'''
+    limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=200))
+    # keyset cursor: the last market_id the client has already seen
+    cursor = fields.Int(load_default=None, validate=validate.Range(min=0))
+    type = fields.Str(load_default=None, validate=validate.OneOf(MARKET_TYPES))
+
+
+class LeaderboardQuerySchema(Schema):
+    '''Validate query string for the paginated leaderboard'''
+    offset = fields.Int(load_default=0, validate=validate.Range(min=0))
+    limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=200))
+    type = fields.Str(load_default=None, validate=validate.OneOf(MARKET_TYPES))
+    variant = fields.Str(load_default=None, validate=validate.Regexp(VARIANT_NAME))
+
+    @validates_schema
+    def validate_board(self, data, **kwargs):
+        '''Weight variants are published for the global board only'''
+        if data.get('type') and data.get('variant'):
+            raise ValidationError('Cannot combine type and variant.', 'variant')
+
+
+class LeaderboardRankQuerySchema(Schema):
+    '''Validate query string for a single market's leaderboard rank'''
+    type = fields.Str(load_default=None, validate=validate.OneOf(MARKET_TYPES))
+
+
+class TrendingQuerySchema(Schema):
+    '''Validate query string for the trending leaderboard'''
+    window = fields.Str(load_default='7d', validate=validate.OneOf(['7d', '30d']))
+    offset = fields.Int(load_default=0, validate=validate.Range(min=0))
+    limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=200))
+
+
+class NearbyQuerySchema(Schema):
+    '''Validate query string for the markets-near-me lookup'''
+    lat = fields.Float(required=True, validate=validate.Range(min=-90, max=90))
+    lng = fields.Float(required=True, validate=validate.Range(min=-180, max=180))
+    radius_km = fields.Float(load_default=5, validate=validate.Range(min=0, max=100, min_inclusive=False))
+    type = fields.Str(load_default=None, validate=validate.OneOf(MARKET_TYPES))
+    limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=100))
+
+
+class SuggestQuerySchema(Schema):
+    '''Validate query string for market name typeahead'''
+    prefix = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=20))
+
+
+class SearchQuerySchema(Schema):
+    '''Validate query string for full-text search'''
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+    scope = fields.Str(load_default='markets', validate=validate.OneOf(['markets', 'reviews']))
+    limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=50))
+    cursor = fields.Str(load_default=None, validate=validate.Length(max=100))
 
 
 class UserRegistrationSchema(Schema):
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Celery worker entry point.
+
+    celery -A celery_worker.celery worker --loglevel=info
+"""
+
+from app import create_app
+
+app = create_app()
+celery = app.celery
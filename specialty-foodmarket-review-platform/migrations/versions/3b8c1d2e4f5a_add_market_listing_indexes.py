@@ -0,0 +1,28 @@
+"""add composite indexes for keyset-paginated market listing
+
+Revision ID: 3b8c1d2e4f5a
+Revises: e4926e58ed4f
+Create Date: 2026-01-12 10:04:51.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8c1d2e4f5a'
+down_revision = 'e4926e58ed4f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.create_index('ix_markets_active_type_id', ['is_active', 'type', 'market_id'], unique=False)
+        batch_op.create_index('ix_markets_active_id', ['is_active', 'market_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.drop_index('ix_markets_active_id')
+        batch_op.drop_index('ix_markets_active_type_id')
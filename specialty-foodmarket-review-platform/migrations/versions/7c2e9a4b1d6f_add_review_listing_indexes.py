@@ -0,0 +1,28 @@
+"""add composite indexes for keyset-paginated review listings
+
+Revision ID: 7c2e9a4b1d6f
+Revises: 3b8c1d2e4f5a
+Create Date: 2026-01-19 14:22:07.530911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9a4b1d6f'
+down_revision = '3b8c1d2e4f5a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.create_index('ix_reviews_market_ts_id', ['market_id', sa.text('timestamp DESC'), 'review_id'], unique=False)
+        batch_op.create_index('ix_reviews_user_ts_id', ['user_id', sa.text('timestamp DESC'), 'review_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_index('ix_reviews_user_ts_id')
+        batch_op.drop_index('ix_reviews_market_ts_id')
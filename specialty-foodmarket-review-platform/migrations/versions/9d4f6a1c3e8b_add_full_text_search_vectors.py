@@ -0,0 +1,45 @@
+"""add generated tsvector columns and GIN indexes for full-text search
+
+Revision ID: 9d4f6a1c3e8b
+Revises: 7c2e9a4b1d6f
+Create Date: 2026-01-26 09:41:12.604377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f6a1c3e8b'
+down_revision = '7c2e9a4b1d6f'
+branch_labels = None
+depends_on = None
+
+# Kept in sync with app/services/search_service.py (same config, same weights).
+MARKETS_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(address, '')), 'B')"
+)
+REVIEWS_VECTOR = "to_tsvector('english', coalesce(comment, ''))"
+
+
+def upgrade():
+    # Generated columns and GIN are PostgreSQL features; SQLite dev databases use the
+    # in-process index in search_service instead.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"ALTER TABLE markets ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({MARKETS_VECTOR}) STORED")
+    op.execute(f"ALTER TABLE reviews ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({REVIEWS_VECTOR}) STORED")
+    op.create_index('ix_markets_search_vector', 'markets', ['search_vector'], postgresql_using='gin')
+    op.create_index('ix_reviews_search_vector', 'reviews', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_reviews_search_vector', table_name='reviews')
+    op.drop_index('ix_markets_search_vector', table_name='markets')
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_column('search_vector')
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.drop_column('search_vector')
@@ -0,0 +1,28 @@
+"""add latitude/longitude to markets for nearby queries
+
+Revision ID: a6e1b7c9d2f4
+Revises: 9d4f6a1c3e8b
+Create Date: 2026-02-02 16:08:45.117290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e1b7c9d2f4'
+down_revision = '9d4f6a1c3e8b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
@@ -0,0 +1,77 @@
+"""add markets.dedupe_key with a pg_trgm index for fuzzy duplicate detection
+
+Revision ID: c3f8e2a7b5d1
+Revises: a6e1b7c9d2f4
+Create Date: 2026-02-09 11:27:36.482915
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8e2a7b5d1'
+down_revision = 'a6e1b7c9d2f4'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.dedupe_service.dedupe_key() as of this revision, so the
+# backfill doesn't change (or break) with the app code.
+_ABBREVIATIONS = {
+    'mkt': 'market', 'mkts': 'markets', 'st': 'street', 'rd': 'road', 'ave': 'avenue', 'av': 'avenue',
+    'blvd': 'boulevard', 'dr': 'drive', 'ln': 'lane', 'hwy': 'highway', 'sq': 'square', 'pl': 'place',
+    'n': 'north', 's': 'south', 'e': 'east', 'w': 'west', 'co': 'company', 'bros': 'brothers', '&': 'and',
+}
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+
+
+def _dedupe_key(name, address):
+    text = unicodedata.normalize('NFKD', f"{name} {address}")
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower().replace("'", '')
+    return ' '.join(_ABBREVIATIONS.get(t, t) for t in _TOKEN_RE.findall(text))
+
+
+def _backfill(bind, chunk_size=1000):
+    """Key every existing market, so the create-time check sees the whole catalog."""
+    markets = sa.table('markets', sa.column('market_id', sa.Integer), sa.column('name', sa.String),
+                       sa.column('address', sa.String), sa.column('dedupe_key', sa.String))
+    set_key = (markets.update().where(markets.c.market_id == sa.bindparam('mid'))
+               .values(dedupe_key=sa.bindparam('key')))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(markets.c.market_id, markets.c.name, markets.c.address)
+            .where(markets.c.market_id > last_id)
+            .order_by(markets.c.market_id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        bind.execute(set_key, [{'mid': r.market_id, 'key': _dedupe_key(r.name, r.address)} for r in rows])
+        last_id = rows[-1].market_id
+
+
+def upgrade():
+    bind = op.get_bind()
+    postgres = bind.dialect.name == 'postgresql'
+    if postgres:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dedupe_key', sa.String(length=400), nullable=True))
+    # filled before the index is built; new and edited markets are keyed on flush
+    _backfill(bind)
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        if postgres:
+            batch_op.create_index('ix_markets_dedupe_key_trgm', ['dedupe_key'], unique=False,
+                                  postgresql_using='gin', postgresql_ops={'dedupe_key': 'gin_trgm_ops'})
+        else:
+            batch_op.create_index('ix_markets_dedupe_key_trgm', ['dedupe_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('markets', schema=None) as batch_op:
+        batch_op.drop_index('ix_markets_dedupe_key_trgm')
+        batch_op.drop_column('dedupe_key')
@@ -0,0 +1,26 @@
+"""add reviews.duplicate_of for near-duplicate review flags
+
+Revision ID: d7a2c5e9f1b3
+Revises: c3f8e2a7b5d1
+Create Date: 2026-02-16 13:52:19.804461
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2c5e9f1b3'
+down_revision = 'c3f8e2a7b5d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duplicate_of', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_column('duplicate_of')
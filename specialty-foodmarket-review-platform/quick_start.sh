@@ -5,6 +5,7 @@
 cd "$(dirname "$0")"
 
 echo "🚀 Starting backend server..."
+echo "   Background tasks run inline unless CELERY_TASK_ALWAYS_EAGER=false (then start a worker and beat, see BACKEND_README.md)"
 
 # Set Flask environment variables and run using venv python
 export FLASK_APP=app.py
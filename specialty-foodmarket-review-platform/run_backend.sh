@@ -123,6 +123,7 @@ print_success "All prerequisites met! Starting Flask application..."
 echo "=============================================================="
 echo ""
 print_info "Starting Flask development server on http://127.0.0.1:5000"
+print_info "Background tasks run inline unless CELERY_TASK_ALWAYS_EAGER=false (then start a worker and beat, see BACKEND_README.md)"
 print_info "Press Ctrl+C to stop the server"
 echo ""
 
@@ -0,0 +1,20 @@
+import pytest
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.dialects import postgresql
+
+from app.utils.leaderboard import SENTIMENT_BINS, sentiment_bin, sentiment_bin_expr
+
+EDGES = [-1.0, -0.8, -0.2000001, 0.0, 0.5, 0.95, 0.9999, 1.0]
+
+
+@pytest.mark.parametrize("score", EDGES)
+def test_sql_bins_match_python_bins(score):
+    with create_engine("sqlite://").connect() as conn:
+        assert conn.execute(select(sentiment_bin_expr(literal(score)))).scalar() == sentiment_bin(score)
+    assert 0 <= sentiment_bin(score) < SENTIMENT_BINS
+
+
+def test_sql_bin_floors_before_casting():
+    # PostgreSQL rounds on CAST(... AS INTEGER), so the floor must be explicit
+    sql = str(sentiment_bin_expr(literal(0.95)).compile(dialect=postgresql.dialect()))
+    assert "CAST(floor(" in sql
@@ -0,0 +1,175 @@
+"""Sentiment pipeline: review writes -> pending queue -> score_reviews -> market stats.
+
+Runs the Celery tasks eagerly against SQLite and fakeredis.
+"""
+import fakeredis
+import lupa  # noqa: F401 - fakeredis runs the stats update's Lua script with it
+import pytest
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("FLASK_ENV", "testing")
+    monkeypatch.setenv("CELERY_TASK_ALWAYS_EAGER", "true")
+    from app import create_app
+    from app.database import db
+    from app.models.models import Market, Review, User
+
+    app = create_app()
+    app.config.update(TESTING=True, SQLALCHEMY_ECHO=False)
+    app.redis_client = fakeredis.FakeRedis()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[Market.__table__, User.__table__, Review.__table__])
+        db.session.add(User(username="owner", email="owner@example.com", password_hash="x"))
+        db.session.add(Market(name="Russo's", address="123 Federal Hill", type="deli"))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity="1", additional_claims={"email_verified": True})
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def _stats(app):
+    from app.utils.leaderboard import stats_key
+    return {k.decode(): float(v) for k, v in app.redis_client.hgetall(stats_key(1)).items()}
+
+
+def test_posted_review_is_scored_and_counted(app, client):
+    from app.database import db
+    from app.models.models import Review
+    from app.services.sentiment_service import score_texts
+
+    text = "Lovely fresh bread and friendly staff"
+    resp = client.post("/1/review", json={"review": text, "rating": 5})
+    assert resp.status_code == 201
+
+    review = db.session.get(Review, resp.json["review_id"])
+    assert review.sentiment_score == pytest.approx(score_texts([text])[0])
+    stats = _stats(app)
+    assert stats["count"] == 1
+    assert stats["rating_sum"] == 5
+    assert stats["sent_sum"] == pytest.approx(review.sentiment_score)
+
+
+def test_edit_while_scoring_is_not_overwritten(app, client, monkeypatch):
+    import app.tasks as tasks
+    from app.database import db
+    from app.models.models import Review
+    from app.services.sentiment_service import score_texts
+    from app.utils.leaderboard import reconcile_leaderboard
+
+    old_text, new_text = "Lovely fresh bread and friendly staff", "Rotten fish and rude staff, avoid it"
+    # post without draining the queue, so the review sits pending
+    monkeypatch.setattr(tasks.score_pending_reviews, "apply_async", lambda **kw: None)
+    review_id = client.post("/1/review", json={"review": old_text, "rating": 5}).json["review_id"]
+    monkeypatch.undo()
+
+    def score_then_edit(texts):
+        # the owner's edit commits after the worker read the old text
+        scores = score_texts(texts)
+        monkeypatch.setattr(tasks, "score_texts", score_texts)
+        assert client.put(f"/review/{review_id}", json={"review": new_text, "rating": 1}).status_code == 200
+        return scores
+
+    monkeypatch.setattr(tasks, "score_texts", score_then_edit)
+    tasks.score_pending_reviews()
+
+    db.session.expire_all()
+    review = db.session.get(Review, review_id)
+    assert review.comment == new_text
+    assert review.sentiment_score == pytest.approx(score_texts([new_text])[0])
+    stats = _stats(app)
+    assert stats["count"] == 1
+    assert stats["rating_sum"] == 1
+    assert stats["sent_sum"] == pytest.approx(review.sentiment_score)
+    assert reconcile_leaderboard(dry_run=True)["drifted"] == 0
+
+
+def test_deleted_market_stays_off_the_board(app, client, monkeypatch):
+    import app.tasks as tasks
+    from app.database import db
+    from app.models.models import Market
+    from app.utils.leaderboard import board_key
+
+    monkeypatch.setattr(tasks.score_pending_reviews, "apply_async", lambda **kw: None)
+    client.post("/1/review", json={"review": "Lovely fresh bread", "rating": 5})
+    monkeypatch.undo()
+    db.session.get(Market, 1).soft_delete()
+    db.session.commit()
+
+    assert client.post("/1/review", json={"review": "Still great", "rating": 5}).status_code == 404
+    tasks.score_pending_reviews()
+    assert app.redis_client.zscore(board_key(), 1) is None
+    assert not _stats(app)
+
+
+def test_reconcile_rechecks_orphans(app, client, monkeypatch):
+    import app.utils.leaderboard as leaderboard
+
+    client.post("/1/review", json={"review": "Lovely fresh bread", "rating": 5})
+    real = leaderboard._expected_stats
+    calls = []
+
+    def first_chunk_misses_review(market_ids):
+        # the review is scored after the chunk pass read the market
+        calls.append(market_ids)
+        return {} if len(calls) == 1 else real(market_ids)
+
+    monkeypatch.setattr(leaderboard, "_expected_stats", first_chunk_misses_review)
+    metrics = leaderboard.reconcile_leaderboard()
+    assert metrics["orphan"] == 0
+    assert app.redis_client.zscore(leaderboard.board_key(), 1) is not None
+    assert _stats(app)["count"] == 1
+
+
+def test_rebuild_keeps_reviews_scored_meanwhile(app, client, monkeypatch):
+    from contextlib import contextmanager
+    import app.utils.leaderboard as leaderboard
+
+    client.post("/1/review", json={"review": "Lovely fresh bread", "rating": 5})
+    real = leaderboard.staged_swap
+
+    @contextmanager
+    def swap_after_a_new_review(*args, **kwargs):
+        # scored after the aggregate query ran, before its rows are written out
+        assert client.post("/1/review", json={"review": "Great cheese", "rating": 3}).status_code == 201
+        with real(*args, **kwargs) as tmp_key:
+            yield tmp_key
+
+    monkeypatch.setattr(leaderboard, "staged_swap", swap_after_a_new_review)
+    assert leaderboard.rebuild_leaderboard()
+    stats = _stats(app)
+    assert stats["count"] == 2
+    assert stats["rating_sum"] == 8
+    assert not app.redis_client.keys("market:*:stats:tmp:*")
+
+
+def test_short_reviews_only_match_the_same_author(app, client):
+    from flask_jwt_extended import create_access_token
+    from app.database import db
+    from app.models.models import Review
+
+    other = app.test_client()
+    other.environ_base["HTTP_AUTHORIZATION"] = "Bearer " + create_access_token(
+        identity="2", additional_claims={"email_verified": True})
+
+    def post(c, text):
+        review_id = c.post("/1/review", json={"review": text, "rating": 5}).json["review_id"]
+        return db.session.get(Review, review_id).duplicate_of
+
+    first = client.post("/1/review", json={"review": "Great food, great service!", "rating": 5}).json["review_id"]
+    assert post(other, "Great food, great service.") is None
+    assert post(client, "Great food, great service.") == first
+
+    long_text = "The sourdough is baked every morning and the olive bar has twenty kinds to choose from"
+    original = client.post("/1/review", json={"review": long_text, "rating": 5}).json["review_id"]
+    assert post(other, long_text + "!") == original